@@ -1,18 +1,43 @@
 import os
 import sys
-import pandas as pd
+import glob
 
 sys.path.append(".")
 import src.visualize_video_bbox as visualize_video_bbox
+import src.export_video as export_video
+import src.visualize_cluster as visualize_cluster
+import src.playlist as playlist
+from src.label_store import read_labels
+from src.label_schema import BBOX_SCHEMA, SEQUENCE_SCHEMA
 
 
-def main(video_path: str, bbox_csv: str = None, sequence_csv: str = None):
+def main(
+    video_path: str,
+    bbox_csv: str = None,
+    sequence_csv: str = None,
+    cache_mb: int = 512,
+    export_path: str = None,
+    workers: int = None,
+    use_proxy: bool = True,
+    show_timing: bool = False,
+    sequences_only: bool = False,
+):
     """Visualize the video with bounding boxes and labels. Works only on clusters.
 
     Args:
-        --video_path   (str):  Path the video file
+        --video_path   (str):  Path the video file, or a cluster folder to play all its cameras in a grid.
+                               Several paths or a glob pattern play the videos one after another.
         --bbox_csv     (str):  Path to the CSV file containing bounding box data.
         --sequence_csv (str):  Path to the CSV file containing sequence data.
+        --cache_mb     (int):  Memory budget in MB for recently decoded frames.
+        --export       (str):  Render to this video file without a display, instead of playing.
+        --workers      (int):  Number of processes for the export. Defaults to the CPU count.
+        --no-proxy            Play the original video even if a proxy is built (see 'scripts/build_proxies.py').
+        --timing              Show decode, draw and display times and dropped frames.
+        --sequences_only      Play only the frames inside the sequences of the sequence CSV, back to back.
+
+    While playing a single video, the CSV files are watched and the labels are
+    reloaded when they are edited, without restarting.
 
     Controls:
         - Space:        Play/Pause
@@ -20,7 +45,12 @@ def main(video_path: str, bbox_csv: str = None, sequence_csv: str = None):
         - Down Arrow:   Decrease playback
         - Left Arrow:   Backward 10 frames
         - Right Arrow:  Forward 10 frames
+        - '[' / ']':    Previous/next sequence start or end
+        - ',' / '.':    Previous/next frame where a track appears or disappears
+        - '-' / '=':    Previous/next frame with duplicate IDs
+        - 'n':          Next video of the playlist
         - 'h':          Toggle HUD
+        - 't':          Toggle timing HUD
         - 'q':          Quit
 
     Raises:
@@ -29,15 +59,62 @@ def main(video_path: str, bbox_csv: str = None, sequence_csv: str = None):
         ValueError:         If the CSV files are empty.
 
     Returns:
-        None: Only visualizes the video with bounding boxes and labels.
+        None: Only visualizes or exports the video with bounding boxes and labels.
     """
     
-    bbox_df     = pd.read_csv(bbox_csv)     if bbox_csv     else None
-    sequence_df = pd.read_csv(sequence_csv) if sequence_csv else None
+    # Play a list or glob of videos in one process, their labels are found in the dataset layout
+    video_paths = [video_path] if isinstance(video_path, str) else list(video_path)
+    if len(video_paths) > 1 or glob.has_magic(video_paths[0]):
+        if export_path is not None:
+            raise ValueError("Export a single video at a time.")
+        playlist.play_playlist(
+            playlist.expand_video_paths(video_paths),
+            bbox_csv,
+            sequence_csv,
+            cache_mb=cache_mb,
+            use_proxy=use_proxy,
+            show_timing=show_timing,
+            sequences_only=sequences_only,
+        )
+        return
+    video_path = video_paths[0]
 
-    # Visualize the video with bounding boxes and labels
     video_name = os.path.basename(video_path)
-    visualize_video_bbox.visualize_video(video_path, bbox_df, sequence_df, video_name)
+
+    # Visualize the video with bounding boxes and labels, reloaded when the CSV files are edited
+    if not os.path.isdir(video_path) and export_path is None:
+
+        # In the dataset layout, the CSV files may hold other videos too
+        main_folder_path, dataset_video_name = playlist.split_video_path(video_path)
+        visualize_video_bbox.visualize_video(
+            video_path,
+            None,
+            None,
+            dataset_video_name if main_folder_path else video_name,
+            cache_mb=cache_mb,
+            use_proxy=use_proxy,
+            show_timing=show_timing,
+            bbox_csv=bbox_csv,
+            sequence_csv=sequence_csv,
+            sequences_only=sequences_only,
+            filter_labels=main_folder_path is not None,
+        )
+        return
+
+    bbox_df     = read_labels(bbox_csv, BBOX_SCHEMA)         if bbox_csv     else None
+    sequence_df = read_labels(sequence_csv, SEQUENCE_SCHEMA) if sequence_csv else None
+
+    # Visualize all cameras of the cluster in a grid
+    if os.path.isdir(video_path):
+        visualize_cluster.visualize_cluster(
+            video_path, bbox_df, sequence_df, cache_mb=cache_mb, use_proxy=use_proxy
+        )
+        return
+
+    # Render the video with bounding boxes and labels to a file
+    export_video.export_video(
+        video_path, bbox_df, sequence_df, export_path, video_name, workers=workers
+    )
 
 
 if __name__ == "__main__":
@@ -51,7 +128,8 @@ if __name__ == "__main__":
     parser.add_argument(
         "--video_path",
         type=str,
-        help="Name of  the video clip and camera name.",
+        nargs="+",
+        help="Name of  the video clip and camera name, or a cluster folder for a grid of all cameras. Several paths or a quoted glob play a playlist.",
         required=True,
     )
     parser.add_argument(
@@ -64,6 +142,40 @@ if __name__ == "__main__":
         type=str,
         help="Path to the CSV file containing sequence data.",
     )
+    parser.add_argument(
+        "--cache_mb",
+        type=int,
+        default=512,
+        help="Memory budget in MB for recently decoded frames.",
+    )
+    parser.add_argument(
+        "--export",
+        type=str,
+        default=None,
+        help="Render to this video file without a display, instead of playing.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of processes for the export. Defaults to the CPU count.",
+    )
+    parser.add_argument(
+        "--no-proxy",
+        action="store_false",
+        help="Play the original video even if a proxy is built.",
+        dest="use_proxy",
+    )
+    parser.add_argument(
+        "--timing",
+        action="store_true",
+        help="Show decode, draw and display times and dropped frames.",
+    )
+    parser.add_argument(
+        "--sequences_only",
+        action="store_true",
+        help="Play only the frames inside the sequences, back to back.",
+    )
     args = parser.parse_args()
 
     # Example usage:
@@ -72,6 +184,19 @@ if __name__ == "__main__":
         --video_path "path/to/video.mp4"
         --bbox_csv "path/to/bbox.csv"
         --sequence_csv "path/to/sequence.csv"
+        [--export "path/to/annotated.mp4"]
+
+    python3 main.py --video_path "data/videos/*/front.mp4"
     """
 
-    main(args.video_path, args.bbox_csv, args.sequence_csv)
+    main(
+        args.video_path,
+        args.bbox_csv,
+        args.sequence_csv,
+        args.cache_mb,
+        args.export,
+        args.workers,
+        args.use_proxy,
+        args.timing,
+        args.sequences_only,
+    )
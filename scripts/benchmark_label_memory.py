@@ -0,0 +1,102 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+from src.label_schema import BBOX_SCHEMA, read_csv_typed
+
+
+def write_synthetic_bbox_csv(csv_path: str, rows: int, videos: int = 200, seed: int = 0) -> None:
+    """Write a synthetic concatenated bounding box CSV file, sorted by video and frame."""
+
+    rng = np.random.default_rng(seed)
+    video_ids = np.sort(rng.integers(0, videos, rows))
+    cameras = np.array(["front", "left", "right", "back"])
+    x1, y1 = rng.random(rows), rng.random(rows)
+    df = pd.DataFrame(
+        {
+            "video_name": np.char.add("video_", video_ids.astype(str)),
+            "camera": cameras[rng.integers(0, len(cameras), rows)],
+            "frame_id": np.arange(rows) % 9000,
+            "pedestrian_id": rng.integers(0, 50, rows),
+            "x1": x1,
+            "y1": y1,
+            "x2": np.minimum(x1 + rng.random(rows) * 0.2, 1.0),
+            "y2": np.minimum(y1 + rng.random(rows) * 0.4, 1.0),
+        }
+    )
+    df.to_csv(csv_path, index=False)
+
+
+def measure(read) -> tuple:
+    """Run the reader and measure its peak traced memory, the result size and the time."""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    df = read()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak, int(df.memory_usage(deep=True).sum()), elapsed
+
+
+def benchmark_label_memory(rows: int = 2_000_000, csv_path: str = None) -> None:
+    """Compare the memory of reading a bounding box CSV file with default and schema types.
+
+    Args:
+        rows (int):     Rows of the synthetic file, ignored if a CSV file is given.
+        csv_path (str): Path to an existing bounding box CSV file to read instead.
+    """
+
+    temp_dir = None
+    if csv_path is None:
+        temp_dir = tempfile.TemporaryDirectory()
+        csv_path = os.path.join(temp_dir.name, "bbox.csv")
+        write_synthetic_bbox_csv(csv_path, rows)
+    print(f"File: {csv_path} ({os.path.getsize(csv_path) / 1024**2:.0f} MB)")
+
+    for name, read in [
+        ("default", lambda: pd.read_csv(csv_path, index_col=False)),
+        ("schema", lambda: read_csv_typed(csv_path, BBOX_SCHEMA)),
+    ]:
+        peak, size, elapsed = measure(read)
+        print(
+            f"{name:>8}: peak {peak / 1024**2:8.1f} MB, "
+            f"DataFrame {size / 1024**2:8.1f} MB, {elapsed:6.2f} s"
+        )
+
+    if temp_dir is not None:
+        temp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare the peak memory of reading label CSV files with and without the schema."
+    )
+    parser.add_argument(
+        "--rows",
+        type=int,
+        default=2_000_000,
+        help="Rows of the synthetic bounding box file.",
+    )
+    parser.add_argument(
+        "--csv",
+        type=str,
+        default=None,
+        help="Path to an existing bounding box CSV file to read instead.",
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/benchmark_label_memory.py --rows 2000000
+    """
+
+    benchmark_label_memory(args.rows, args.csv)
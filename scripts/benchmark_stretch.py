@@ -0,0 +1,128 @@
+import os
+import sys
+import time
+import tempfile
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+from scripts.benchmark_label_memory import write_synthetic_bbox_csv
+from scripts.stretch_sequence import stretch_sequence
+
+
+def stretch_sequence_legacy(sequence_csv: str, bbox_csv: str) -> None:
+    """Previous implementation, expanding the sequences row by row and merging everything at once."""
+
+    seq_df = pd.read_csv(sequence_csv)
+    bbox_df = pd.read_csv(bbox_csv)
+
+    expanded_rows = []
+    for _, row in seq_df.iterrows():
+        for frame_id in range(row["start_frame"], row["end_frame"] + 1):
+            expanded_rows.append({
+                "video_name": row["video_name"],
+                "frame_id": frame_id,
+                "pedestrian_id": row["pedestrian_id"],
+                "gesture_label_id": row["gesture_label_id"]
+            })
+    expanded_df = pd.DataFrame(expanded_rows)
+
+    merged_df = pd.merge(
+        expanded_df, bbox_df, on=["video_name", "frame_id", "pedestrian_id"], how="inner"
+    )
+    merged_df = merged_df.sort_values(by=["video_name", "gesture_label_id", "frame_id", "pedestrian_id"])
+
+    output_csv = sequence_csv.replace("sequence.csv", "stretched.csv")
+    merged_df.to_csv(output_csv, index=False)
+
+
+def write_synthetic_sequence_csv(
+    sequence_csv: str, bbox_csv: str, sequences: int, max_length: int = 300, seed: int = 0
+) -> None:
+    """Write synthetic sequences over the pedestrians and frames of a bounding box file."""
+
+    rng = np.random.default_rng(seed)
+    bbox_df = pd.read_csv(bbox_csv, usecols=["video_name", "camera", "frame_id", "pedestrian_id"])
+    picks = bbox_df.iloc[rng.integers(0, len(bbox_df), sequences)].reset_index(drop=True)
+    seq_df = pd.DataFrame(
+        {
+            "video_name": picks["video_name"],
+            "camera": picks["camera"],
+            "pedestrian_id": picks["pedestrian_id"],
+            "start_frame": picks["frame_id"],
+            "end_frame": picks["frame_id"] + rng.integers(0, max_length, sequences),
+            "gesture_label_id": rng.integers(0, 10, sequences),
+            "body_desc": "",
+            "interpret_desc": "",
+        }
+    )
+    seq_df.to_csv(sequence_csv, index=False)
+
+
+def measure(function, *args) -> tuple:
+    """Run the function and measure its time and peak traced memory."""
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return elapsed, peak
+
+
+def benchmark_stretch(rows: int = 1_000_000, sequences: int = 5_000) -> None:
+    """Compare the stretch implementations on a synthetic dataset, and check they label the same boxes.
+
+    Args:
+        rows (int):         Rows of the synthetic bounding box file.
+        sequences (int):    Rows of the synthetic sequence file.
+    """
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        bbox_csv = os.path.join(temp_dir, "bbox.csv")
+        sequence_csv = os.path.join(temp_dir, "sequence.csv")
+        stretched_csv = os.path.join(temp_dir, "stretched.csv")
+        write_synthetic_bbox_csv(bbox_csv, rows)
+        write_synthetic_sequence_csv(sequence_csv, bbox_csv, sequences)
+
+        results = {}
+        for name, function in [("legacy", stretch_sequence_legacy), ("joined", stretch_sequence)]:
+            elapsed, peak = measure(function, sequence_csv, bbox_csv)
+            results[name] = pd.read_csv(stretched_csv)
+            print(
+                f"{name:>8}: {elapsed:6.2f} s, {len(results[name]) / elapsed:10.0f} rows/s, "
+                f"peak {peak / 1024**2:8.1f} MB"
+            )
+
+        # Same boxes, the legacy output repeats a box once per overlapping sequence
+        keys = ["video_name", "frame_id", "pedestrian_id"]
+        legacy = results["legacy"][keys].drop_duplicates()
+        joined = results["joined"][keys].drop_duplicates()
+        same = len(legacy) == len(joined) and len(legacy.merge(joined)) == len(legacy)
+        repeated = len(results["legacy"]) - len(results["joined"])
+        print(f"Same boxes: {same}, repeated legacy rows of overlapping sequences: {repeated}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Compare the stretch implementations on a synthetic dataset."
+    )
+    parser.add_argument(
+        "--rows", type=int, default=1_000_000, help="Rows of the bounding box file."
+    )
+    parser.add_argument(
+        "--sequences", type=int, default=5_000, help="Rows of the sequence file."
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/benchmark_stretch.py --rows 1000000 --sequences 5000
+    """
+
+    benchmark_stretch(args.rows, args.sequences)
@@ -0,0 +1,73 @@
+import os
+import sys
+from tqdm import tqdm
+
+sys.path.append(".")
+from src.catalog import open_catalog, list_files
+
+
+def build_catalog(main_folder_path: str, probe: bool = False) -> None:
+    """Create or refresh the catalog of a dataset folder.
+
+    Later runs only list the folders changed since the last refresh. The scripts
+    open the same catalog instead of walking the folder again.
+
+    Args:
+        main_folder_path (str): Path to the folder to catalog, eg. the main folder of the dataset.
+        probe (bool):           Also probe the frame rate and frame count of every video.
+
+    Output:
+        main_folder/
+        ├── .index/
+        │   ├── catalog.sqlite
+        ├── videos/
+        ...
+    """
+
+    if not os.path.isdir(main_folder_path):
+        raise NotADirectoryError(f"'{main_folder_path}' is not a directory.")
+
+    catalog = open_catalog(main_folder_path)
+    file_paths = list_files(main_folder_path, recursive=True)
+    video_paths = [
+        file_path
+        for file_path in file_paths
+        if file_path.endswith((".mp4", ".avi", ".mov", ".MP4"))
+    ]
+    print(f"Catalog of '{main_folder_path}': {len(file_paths)} files, {len(video_paths)} videos.")
+
+    if probe:
+        for video_path in tqdm(video_paths, desc="Probing videos"):
+            try:
+                catalog.video_info(video_path)
+            except FileNotFoundError as e:
+                print(f"Warning: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Create or refresh the catalog of the files in a dataset folder."
+    )
+    parser.add_argument(
+        "--main_folder",
+        type=str,
+        help="Path to the folder to catalog.",
+        required=True,
+    )
+    parser.add_argument(
+        "--probe",
+        action="store_true",
+        help="Also probe the frame rate and frame count of every video.",
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/build_catalog.py \
+        --main_folder ../data/realworldgestures \
+        --probe
+    """
+
+    build_catalog(args.main_folder, args.probe)
@@ -0,0 +1,165 @@
+import os
+import sys
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from tqdm import tqdm
+
+sys.path.append(".")
+from src.video_proxy import get_proxy_path
+
+
+def build_proxy(video_path: str, proxy_path: str, height: int = 360, gop: int = 1) -> None:
+    """Transcode a video to a small proxy with short GOPs for fast seeking.
+
+    Args:
+        video_path (str):   Path to the input video file.
+        proxy_path (str):   Path to the output proxy file.
+        height (int):       Height of the proxy in pixels, the width keeps the aspect ratio.
+        gop (int):          Frames between keyframes, 1 for all-intra.
+
+    Returns:
+        None: The proxy is written to the proxy path.
+    """
+
+    os.makedirs(os.path.dirname(proxy_path), exist_ok=True)
+
+    # Write to a temporary file, so an interrupted transcode is never mistaken for a proxy
+    temp_path = os.path.splitext(proxy_path)[0] + ".part.mp4"
+    command = [
+        "ffmpeg",
+        "-y",
+        "-i",
+        video_path,
+        "-an",  # Remove audio
+        "-vf",
+        f"scale=-2:{height}",
+        "-vsync",
+        "passthrough",  # Keep every frame, indices map 1:1 to the original
+        "-c:v",
+        "libx264",
+        "-preset",
+        "veryfast",
+        "-crf",
+        "28",
+        "-g",
+        str(gop),
+        "-bf",
+        "0",
+        "-pix_fmt",
+        "yuv420p",
+        "-threads",
+        "2",
+        temp_path,
+    ]
+    try:
+        subprocess.run(
+            command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+    except subprocess.CalledProcessError as e:
+        print(f"Error: {e}")
+        print(f"Command: {' '.join(command)}")
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise e
+
+    os.replace(temp_path, proxy_path)
+
+
+def build_proxies(
+    main_folder_path: str,
+    videos_folder_name: str = "videos",
+    height: int = 360,
+    gop: int = 1,
+    workers: int = None,
+) -> None:
+    """Build proxies of all videos in the dataset layout in parallel. Up-to-date proxies are skipped.
+
+    Args:
+        main_folder_path (str):     Path to the main folder containing the videos folder.
+        videos_folder_name (str):   Name of the videos folder.
+        height (int):               Height of the proxies in pixels.
+        gop (int):                  Frames between keyframes, 1 for all-intra.
+        workers (int):              Number of parallel transcodes. Defaults to half the CPU count.
+
+    Output:
+        main_folder_path/
+        ├── videos/
+        │   ├── video_00/
+        │   │   ├── front.mp4
+        ├── proxies/
+        │   ├── video_00/
+        │   │   ├── front.mp4
+        ...
+    """
+
+    videos_folder_path = os.path.join(main_folder_path, videos_folder_name)
+    if not os.path.exists(videos_folder_path):
+        raise FileNotFoundError(f"Video folder '{videos_folder_path}' not found.")
+    if not os.path.isdir(videos_folder_path):
+        raise NotADirectoryError(f"'{videos_folder_path}' is not a folder.")
+
+    # Get the videos without an up-to-date proxy
+    jobs = []
+    for root, dirs, files in os.walk(videos_folder_path):
+        dirs[:] = [d for d in dirs if not d.startswith(".")]  # Skip sidecar folders
+        for video in files:
+            if not video.endswith((".mp4", ".avi", ".mov", ".MP4")):
+                continue
+            video_path = os.path.join(root, video)
+            proxy_path = get_proxy_path(video_path)
+            if os.path.exists(proxy_path) and os.path.getmtime(
+                proxy_path
+            ) >= os.path.getmtime(video_path):
+                continue
+            jobs.append((video_path, proxy_path))
+
+    if len(jobs) == 0:
+        print("All proxies are up to date.")
+        return
+
+    # Transcode in parallel, each ffmpeg process uses two threads
+    workers = workers or max(1, (os.cpu_count() or 2) // 2)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(build_proxy, video_path, proxy_path, height, gop)
+            for video_path, proxy_path in jobs
+        ]
+        for future in tqdm(futures, desc="Building proxies"):
+            future.result()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Build low-resolution proxies of the videos for fast scrubbing."
+    )
+    parser.add_argument(
+        "--main_folder",
+        type=str,
+        help="Path to the main folder containing the videos folder.",
+        required=True,
+    )
+    parser.add_argument(
+        "--height", type=int, default=360, help="Height of the proxies in pixels."
+    )
+    parser.add_argument(
+        "--gop", type=int, default=1, help="Frames between keyframes, 1 for all-intra."
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Number of parallel transcodes."
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/build_proxies.py \
+        --main_folder ../data/realworldgestures
+    """
+
+    build_proxies(
+        main_folder_path=args.main_folder,
+        height=args.height,
+        gop=args.gop,
+        workers=args.workers,
+    )
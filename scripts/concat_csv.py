@@ -1,5 +1,9 @@
 import os
-import pandas as pd
+import sys
+
+sys.path.append(".")
+from src.label_store import read_labels
+from src.label_schema import concat_labels
 
 
 def concat_csvs(csv_dir: str):
@@ -22,7 +26,7 @@ def concat_csvs(csv_dir: str):
         raise FileNotFoundError(f"No CSV files found in {csv_dir}.")
 
     # Concatenate the CSV files into a single DataFrame
-    combined_df = pd.concat([pd.read_csv(f) for f in csv_files], ignore_index=True)
+    combined_df = concat_labels([read_labels(f) for f in csv_files])
 
     # Save the combined DataFrame to a new CSV file
     combined_csv_path = os.path.join(csv_dir, "combined.csv")
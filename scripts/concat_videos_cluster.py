@@ -1,7 +1,11 @@
 import os
+import sys
 import subprocess
 from tqdm import tqdm
 
+sys.path.append(".")
+from src.catalog import open_catalog, list_files, list_dirs
+
 
 def write_txt_file(video_paths: list, LIST_FILE="file_list.txt") -> None:
     """Write video paths to a file list for ffmpeg."""
@@ -28,12 +32,12 @@ def get_camera_types(input_dir: str) -> list:
 
     # Get the types of video files in the dir
     camera_types = []
-    for _, _, files in os.walk(input_dir):
-        for video in files:
-            if not video.endswith((".mp4", ".avi", ".mov", ".MP4")):
-                continue
-            camera_type = video.split("-")[-1].split(".")[0]
-            camera_types.append(camera_type)
+    for video_path in list_files(input_dir, recursive=True):
+        video = os.path.basename(video_path)
+        if not video.endswith((".mp4", ".avi", ".mov", ".MP4")):
+            continue
+        camera_type = video.split("-")[-1].split(".")[0]
+        camera_types.append(camera_type)
 
     # Remove duplicates
     camera_types = list(set(camera_types))
@@ -92,8 +96,11 @@ def concat_dir_videos(
     output_dir = os.path.join(f"{parent_dir}_{extension_name}", "videos")
     os.makedirs(output_dir, exist_ok=True)
 
+    # Catalog the parent dir once, or use the dataset catalog above it, instead of walking every sub dir
+    open_catalog(parent_dir)
+
     # Get sub dirs
-    input_dirs = [f.path for f in os.scandir(parent_dir) if f.is_dir()]
+    input_dirs = list_dirs(parent_dir)
     if len(input_dirs) == 0:
         raise FileNotFoundError(f"No sub dirs found in '{parent_dir}'.")
 
@@ -167,9 +174,9 @@ def concat_videos(input_dir: str, output_file: str, include_word: str) -> None:
 
     # Get video files containing 'search word', reverse order
     video_list = [
-        os.path.join(input_dir, f.name)
-        for f in os.scandir(input_dir)
-        if f.is_file() and include_word in f.name
+        video_path
+        for video_path in list_files(input_dir)
+        if include_word in os.path.basename(video_path)
     ]
     if len(video_list) == 0:
         return
@@ -0,0 +1,77 @@
+import os
+import sys
+from tqdm import tqdm
+
+sys.path.append(".")
+from src.label_store import convert_csv, has_store
+
+
+def convert_labels(labels_folder_path: str, force: bool = False) -> None:
+    """Convert every label CSV file in the folder to a columnar store next to it.
+
+    Readers pick up the store instead of the CSV file while it is up to date.
+    Editing the CSV file makes the store outdated, so the CSV file is read again
+    until it is converted anew.
+
+    Args:
+        labels_folder_path (str):   Path to the labels folder, or a single CSV file.
+        force (bool):               Convert also the CSV files with an up-to-date store.
+
+    Output:
+        labels/
+        ├── clean/
+        │   ├── bbox/
+        │   │   ├── video_00_front.csv
+        │   │   ├── video_00_front.npz
+        ...
+    """
+
+    if not os.path.exists(labels_folder_path):
+        raise FileNotFoundError(f"Labels folder '{labels_folder_path}' not found.")
+
+    # Get the CSV files without an up-to-date store
+    if os.path.isfile(labels_folder_path):
+        csv_paths = [labels_folder_path]
+    else:
+        csv_paths = [
+            os.path.join(root, file)
+            for root, _, files in os.walk(labels_folder_path)
+            for file in sorted(files)
+            if file.endswith(".csv")
+        ]
+    csv_paths = [csv_path for csv_path in csv_paths if force or not has_store(csv_path)]
+
+    if len(csv_paths) == 0:
+        print("All label stores are up to date.")
+        return
+
+    for csv_path in tqdm(csv_paths, desc="Converting labels"):
+        convert_csv(csv_path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Convert label CSV files to columnar stores for fast loading."
+    )
+    parser.add_argument(
+        "--labels_folder",
+        type=str,
+        help="Path to the labels folder, or a single CSV file.",
+        required=True,
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert also the CSV files with an up-to-date store.",
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/convert_labels.py \
+        --labels_folder ../data/realworldgestures/labels
+    """
+
+    convert_labels(args.labels_folder, args.force)
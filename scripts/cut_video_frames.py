@@ -2,7 +2,8 @@ import os
 import sys
 
 sys.path.append(".")
-from scripts.cut_video_time import cut_video_time, get_fps
+from scripts.cut_video_time import cut_video_time
+from src.video_index import VideoIndex
 
 
 def cut_video_frames(input_file: str, start_frame: int, end_frame: int) -> None:
@@ -23,11 +24,15 @@ def cut_video_frames(input_file: str, start_frame: int, end_frame: int) -> None:
             f"End frame '{end_frame}' must be greater than start frame '{start_frame}'."
         )
 
-    fps = get_fps(input_file)
-    print(f"FPS: {fps}")
+    # Exact frame timestamps from the video index
+    video_index = VideoIndex.load(input_file)
+    if start_frame >= video_index.frame_count:
+        raise ValueError(
+            f"Start frame '{start_frame}' is beyond the last frame '{video_index.frame_count - 1}'."
+        )
 
-    start_time = start_frame / fps
-    end_time = end_frame / fps
+    start_time = video_index.frame_time(start_frame)
+    end_time = video_index.frame_time(min(end_frame, video_index.frame_count))
     cut_video_time(input_file, start_time, end_time)
 
 
@@ -1,4 +1,6 @@
 import os
+import sys
+import contextlib
 from tqdm import tqdm
 from ultralytics import YOLO
 import torch
@@ -6,6 +8,13 @@ import cv2
 import logging
 import numpy as np
 
+sys.path.append(".")
+from src.video_index import VideoIndex
+from src.label_store import LabelWriter, has_store, read_labels, merge_parts
+from src.label_schema import BBOX_SCHEMA
+
+BBOX_COLUMNS = ["video_name", "camera", "frame_id", "pedestrian_id", "x1", "y1", "x2", "y2"]
+
 # Suppress YOLOv8 logging
 logging.getLogger("ultralytics").setLevel(logging.ERROR)
 
@@ -48,7 +57,7 @@ def update_csv_path(
 
     # Make concatenated CSV file
     with open(csv_path, "w") as f:
-        f.write("video_name,frame_id,pedestrian_id,x1,y1,x2,y2\n")
+        f.write(",".join(BBOX_COLUMNS) + "\n")
 
     return csv_path
 
@@ -75,6 +84,7 @@ def extract_person_from_videos(
     main_folder_path: str,
     output_folder: str = "data/labels/",
     concat: bool = True,
+    columnar: bool = False,
 ) -> None:
     """Extracts people from folder of videos. Saves bounding boxes and tracking IDs to CSV file.
 
@@ -82,6 +92,7 @@ def extract_person_from_videos(
         videos_folder (str): Path to the folder containing video files.
         output_folder (str): Path to the output folder for CSV files.
         concat (bool):       Whether to concatenate CSV files or not.
+        columnar (bool):     Write the columnar store of each CSV file instead, see 'src/label_store.py'.
 
     Returns:
         None: A new CSV file is created in the output folder.
@@ -100,12 +111,26 @@ def extract_person_from_videos(
     # Update CSV path
     concat_csv_path = update_csv_path(main_folder_path, output_folder, concat=concat)
 
-    # Process each video file
-    for video_file in tqdm(video_files, desc="Videos"):
+    # Extracted frames of the concatenated file, read once for all videos
+    completed = get_completed_frames(concat_csv_path) if concat else None
 
-        # Run pose extraction
-        video_path = os.path.join(videos_folder_path, video_file)
-        pose_from_video(video_path, concat_csv_path, concat=concat)
+    # One writer for the concatenated file, so its store is merged once
+    writer = LabelWriter(concat_csv_path, BBOX_COLUMNS, columnar=columnar) if concat else None
+
+    # Process each video file
+    with writer or contextlib.nullcontext():
+        for video_file in tqdm(video_files, desc="Videos"):
+
+            # Run pose extraction
+            video_path = os.path.join(videos_folder_path, video_file)
+            pose_from_video(
+                video_path,
+                concat_csv_path,
+                concat=concat,
+                columnar=columnar,
+                completed=completed,
+                writer=writer,
+            )
 
 
 def get_videos(videos_folder_path: str) -> list:
@@ -131,24 +156,110 @@ def get_videos(videos_folder_path: str) -> list:
     return []
 
 
-def add_tqdm(element, video_path):
+def add_tqdm(element, video_path, initial: int = 0):
 
-    # Get total frame count using OpenCV
-    cap = cv2.VideoCapture(video_path)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    cap.release()
+    # Get exact total frame count from the video index
+    total_frames = VideoIndex.load(video_path).frame_count
 
     # Get video file name
     video_file = os.path.basename(video_path)
 
-    # Initialize tqdm progress bar
-    element = tqdm(element, total=total_frames, desc=video_file, unit="frames")
+    # Initialize tqdm progress bar, starting at the resumed frame
+    element = tqdm(
+        element, total=total_frames, initial=initial, desc=video_file, unit="frames"
+    )
 
     return element
 
 
-def pose_from_video(video_path: str, csv_path: str, concat: bool = False):
-    """Extracts people from video and saves them with bounding boxes and tracking IDs in a CSV file."""
+def get_completed_frames(csv_path: str) -> dict:
+    """Get the frames already extracted to the labels, to resume the extraction.
+
+    Args:
+        csv_path (str): Path to the CSV file, or the CSV path of a columnar store.
+
+    Returns:
+        dict: Frame IDs of each (video name, camera) as a set, and the highest
+            pedestrian ID as 'max_pedestrian_id'. Empty if the file does not exist.
+    """
+
+    # Recover the batches of an interrupted columnar run
+    merge_parts(csv_path, BBOX_SCHEMA)
+
+    if not has_store(csv_path) and (
+        not os.path.exists(csv_path) or os.path.getsize(csv_path) == 0
+    ):
+        return {}
+
+    df = read_labels(csv_path, BBOX_SCHEMA)
+    if df.empty or "camera" not in df.columns:
+        return {}
+
+    # One hashed set of frames per video and camera, built once
+    completed = {}
+    for (video_name, camera), group in df.groupby(
+        [df["video_name"].astype(str), df["camera"].astype(str)], observed=True
+    ):
+        completed[(video_name, camera)] = {
+            "frame_ids": set(group["frame_id"].tolist()),
+            "max_pedestrian_id": int(group["pedestrian_id"].max()),
+        }
+
+    return completed
+
+
+def read_frames(video_path: str, start_frame: int = 0):
+    """Yield the frame IDs and frames of a video, seeking to the start frame through the video index.
+
+    Args:
+        video_path (str):   Path to the video file.
+        start_frame (int):  First frame to read.
+
+    Yields:
+        tuple: Frame ID and frame.
+    """
+
+    cap = cv2.VideoCapture(video_path)
+    try:
+        VideoIndex.load(video_path).seek(cap, start_frame)
+        frame_id = start_frame
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            yield frame_id, frame
+            frame_id += 1
+    finally:
+        cap.release()
+
+
+def pose_from_video(
+    video_path: str,
+    csv_path: str,
+    concat: bool = False,
+    columnar: bool = False,
+    completed: dict = None,
+    writer: LabelWriter = None,
+):
+    """Extracts people from video and saves them with bounding boxes and tracking IDs in a CSV file.
+
+    The rows are buffered and written in batches, see 'LabelWriter', and the
+    buffered ones are still written if the extraction is interrupted.
+
+    An interrupted extraction resumes after the last extracted frame of the video,
+    seeking there instead of decoding the extracted frames again. The tracker
+    starts over at the resumed frame, so its IDs continue after the highest
+    extracted one, to not merge different pedestrians.
+
+    Args:
+        video_path (str):   Path to the video file, in its video name folder.
+        csv_path (str):     Path to the CSV file, or the concatenated one if 'concat'.
+        concat (bool):      Whether to write to the concatenated CSV file.
+        columnar (bool):    Write the columnar store of the CSV file instead.
+        completed (dict):   Extracted frames of the CSV file from 'get_completed_frames'. Read if None.
+        writer (LabelWriter): Open writer of the CSV file, eg. shared by the videos of a concatenated file.
+                            Opened and closed for the video if None.
+    """
 
     # Check if the video file exists and is a valid format
     if not os.path.exists(video_path):
@@ -171,63 +282,61 @@ def pose_from_video(video_path: str, csv_path: str, concat: bool = False):
     # individual_csv_path = csv_path.replace(".csv", f"{video_name}_{camera}.csv") # Update to be contain path without all folders
     csv_path = csv_path if concat else individual_csv_path
 
-    # Create individual CSV file for each video if it doesn't exist
-    if not os.path.exists(csv_path) and not concat:
-        with open(csv_path, "w") as f:
-            f.write("video_name,camera,frame_id,pedestrian_id,x1,y1,x2,y2\n")
-    else:
-        return  # Skip if the file already exists and concatenation is not needed
-
-    # Get existing lines from the CSV file to test for duplicates
-    with open(csv_path, "r") as f:
-        lines = f.readlines()
+    # Resume after the last extracted frame, the writer adds the header to new files
+    if completed is None:
+        completed = get_completed_frames(csv_path)
+    video_completed = completed.get((video_name, camera))
+    start_frame, id_offset = 0, 0
+    if video_completed is not None:
+        start_frame = max(video_completed["frame_ids"]) + 1
+        id_offset = max(video_completed["max_pedestrian_id"], 0) + 1
+    if start_frame >= VideoIndex.load(video_path).frame_count:
+        return  # Skip if the video is already extracted
 
     # Load YOLO model
     yolo = YOLO("weights/yolov8s.pt")
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     yolo.to(device).eval()
 
-    # Track full video and stream frame-by-frame
-    results = yolo.track(
-        source=video_path,
-        stream=True,
-        persist=True,
-        conf=0.1,
-        iou=0.6,
-    )
-
     # Process each frame and extract people
-    results = add_tqdm(results, video_path)
-    for frame_id, result in enumerate(results):
-        if result.boxes is None:
-            continue
-
-        # Get video file name and dimensions
-        width, height = result.orig_shape[1], result.orig_shape[0]
-
-        # Skip if already in file
-        if any(f"{video_name},{frame_id}" in line for line in lines):
-            continue
-
-        # Exclude non-person detections
-        person_boxes = result.boxes[result.boxes.cls == 0]
-        if len(person_boxes) == 0:
-            continue
-
-        # Process each detected person
-        for box in person_boxes:
-            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy()
-            x1_norm, y1_norm, x2_norm, y2_norm = np.array([x1, y1, x2, y2]) / np.array(
+    frames = add_tqdm(read_frames(video_path, start_frame), video_path, initial=start_frame)
+    with (
+        LabelWriter(csv_path, BBOX_COLUMNS, columnar=columnar)
+        if writer is None
+        else contextlib.nullcontext(writer)
+    ) as writer:
+        for frame_id, frame in frames:
+
+            # Track frame-by-frame, keeping the tracks between frames
+            result = yolo.track(frame, persist=True, conf=0.1, iou=0.6, verbose=False)[0]
+            if result.boxes is None:
+                continue
+
+            # Get video file name and dimensions
+            width, height = result.orig_shape[1], result.orig_shape[0]
+
+            # Exclude non-person detections
+            person_boxes = result.boxes[result.boxes.cls == 0]
+            if len(person_boxes) == 0:
+                continue
+
+            # Normalize the boxes of all detected people at once
+            boxes_norm = person_boxes.xyxy.cpu().numpy() / np.array(
                 [width, height, width, height]
             )
-            pedestrian_id = int(box.id[0]) if box.id is not None else -1
-
-            # Append result to CSV
-            with open(csv_path, "a") as f:
-                f.write(
-                    f"{video_name},{camera},{frame_id},{pedestrian_id},{x1_norm},{y1_norm},{x2_norm},{y2_norm}\n"
-                )
+            pedestrian_ids = (
+                person_boxes.id.int().cpu().numpy() + id_offset
+                if person_boxes.id is not None
+                else np.full(len(person_boxes), -1)
+            )
 
+            # Buffer the frame's rows
+            writer.write_rows(
+                [
+                    (video_name, camera, frame_id, int(pedestrian_id), *box_norm)
+                    for pedestrian_id, box_norm in zip(pedestrian_ids, boxes_norm.tolist())
+                ]
+            )
 
 if __name__ == "__main__":
 
@@ -265,6 +374,11 @@ if __name__ == "__main__":
         "--no-concat", action="store_false", help="Individual CSV files.", dest="concat"
     )
     parser.set_defaults(concat=True)
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Write the columnar label store instead of the CSV file.",
+    )
     args = parser.parse_args()
 
     # Example usage
@@ -279,4 +393,5 @@ if __name__ == "__main__":
         videos_folder="videos",
         filter=args.filter,
         concat=args.concat,
+        columnar=args.columnar,
     )
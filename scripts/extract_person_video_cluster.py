@@ -1,14 +1,19 @@
 import sys
 import os
+import contextlib
 import pandas as pd
 from tqdm import tqdm
 
 sys.path.append(".")
 from scripts.extract_person_video import (
+    BBOX_COLUMNS,
     confirm_folder,
     update_csv_path,
+    get_completed_frames,
     pose_from_video,
 )
+from src.label_store import LabelWriter
+from src.catalog import open_catalog, list_files, list_dirs
 
 
 def get_video_files_in_cluster(
@@ -24,11 +29,7 @@ def get_video_files_in_cluster(
         list: List of video files in the cluster folders.
     """
 
-    sub_dirs = [
-        os.path.join(videos_folder_path, sub_dir)
-        for sub_dir in os.listdir(videos_folder_path)
-        if os.path.isdir(os.path.join(videos_folder_path, sub_dir))
-    ]
+    sub_dirs = list_dirs(videos_folder_path)
     if len(sub_dirs) == 0:
         print(
             f"Error: No subdirectories found in the input folder '{videos_folder_path}'."
@@ -43,10 +44,13 @@ def get_video_files_in_cluster(
 
         # Get video files in the subdirectory
         video_files = [
-            os.path.join(sub_dir_name, video_file)
-            for video_file in os.listdir(sub_dir)
-            if video_file.lower().endswith((".mp4", ".avi", ".mov"))
-            and (manual_include_word is None or manual_include_word in video_file)
+            os.path.join(sub_dir_name, os.path.basename(video_path))
+            for video_path in list_files(sub_dir)
+            if video_path.lower().endswith((".mp4", ".avi", ".mov"))
+            and (
+                manual_include_word is None
+                or manual_include_word in os.path.basename(video_path)
+            )
         ]
 
         # Check if any video files were found
@@ -82,6 +86,7 @@ def extract_person_from_videos(
 
     # Check if the main folder exists and is a directory
     videos_folder_path = confirm_folder(main_folder_path, videos_folder)
+    open_catalog(main_folder_path)
 
     relative_video_paths = get_video_files_in_cluster(
         videos_folder_path, manual_include_word
@@ -93,12 +98,21 @@ def extract_person_from_videos(
     # Update CSV path
     concat_csv_path = update_csv_path(main_folder_path, output_folder, concat=concat)
 
-    # Process each video file
-    for relative_video_path in tqdm(relative_video_paths, desc="Videos"):
+    # Extracted frames of the concatenated file, read once for all videos
+    completed = get_completed_frames(concat_csv_path) if concat else None
+
+    # One writer for the concatenated file
+    writer = LabelWriter(concat_csv_path, BBOX_COLUMNS) if concat else None
 
-        # Run pose extraction
-        video_path = os.path.join(videos_folder_path, relative_video_path)
-        pose_from_video(video_path, concat_csv_path, concat=concat)
+    # Process each video file
+    with writer or contextlib.nullcontext():
+        for relative_video_path in tqdm(relative_video_paths, desc="Videos"):
+
+            # Run pose extraction
+            video_path = os.path.join(videos_folder_path, relative_video_path)
+            pose_from_video(
+                video_path, concat_csv_path, concat=concat, completed=completed, writer=writer
+            )
 
 
 if __name__ == "__main__":
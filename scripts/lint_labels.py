@@ -0,0 +1,282 @@
+import os
+import sys
+import json
+import time
+import multiprocessing
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(".")
+from src.label_store import read_labels, get_store_path, has_store
+from src.label_schema import BBOX_SCHEMA, SEQUENCE_SCHEMA
+from src.catalog import list_files
+from src.interval_join import encode_keys
+
+COORD_COLUMNS = ["x1", "y1", "x2", "y2"]
+KEY_COLUMNS = ["video_name", "camera"]
+
+
+def find_label_files(labels_folder_path: str) -> list:
+    """Find the bounding box and sequence files of the labels folder, paired by version and name.
+
+    Args:
+        labels_folder_path (str): Path to the labels folder, with 'raw', 'clean' or no version sub folders.
+
+    Returns:
+        list: Tuples of the bounding box and sequence file paths, None if a file has no partner.
+    """
+
+    pairs = {}
+    for version in [None, "clean", "raw"]:
+        for csv_type in ["bbox", "sequence"]:
+            folder_path = os.path.join(
+                *[p for p in [labels_folder_path, version, csv_type] if p is not None]
+            )
+            if not os.path.isdir(folder_path):
+                continue
+
+            # Label files by their CSV path, also the converted ones without a CSV file
+            for file_path in list_files(folder_path):
+                csv_path = os.path.splitext(file_path)[0] + ".csv"
+                if file_path.endswith(".csv") or (
+                    file_path.endswith(".npz") and file_path == get_store_path(csv_path)
+                ):
+                    key = (version, os.path.basename(csv_path))
+                    pairs.setdefault(key, {})[csv_type] = csv_path
+
+    return [(pair.get("bbox"), pair.get("sequence")) for _, pair in sorted(pairs.items(), key=str)]
+
+
+def get_rows(mask: np.ndarray, max_examples: int) -> list:
+    """Get the zero-based row indices of the first flagged rows, not counting the header.
+
+    Row indices hold for the CSV file and its store alike, unlike line numbers,
+    which blank lines and quoted line breaks shift and a store does not have.
+    """
+
+    return np.flatnonzero(mask)[:max_examples].tolist()
+
+
+def add_issue(issues: dict, check: str, mask: np.ndarray, max_examples: int) -> None:
+    """Add the flagged rows of a check to the issues, if any."""
+
+    count = int(np.count_nonzero(mask))
+    if count > 0:
+        issues[check] = {"count": count, "row_indices": get_rows(mask, max_examples)}
+
+
+def lint_bbox(df: pd.DataFrame, max_examples: int = 20) -> dict:
+    """Check the bounding boxes for duplicate IDs in a frame, coordinates outside [0, 1] and inverted boxes."""
+
+    issues = {}
+    missing = [column for column in BBOX_SCHEMA if column not in df.columns]
+    if missing:
+        return {"missing_columns": {"count": len(missing), "columns": missing}}
+
+    # The same tracked pedestrian twice in a frame, untracked detections have ID -1
+    keys = [column for column in KEY_COLUMNS if column in df.columns]
+    pedestrian_ids = df["pedestrian_id"].to_numpy(dtype=np.float64, na_value=np.nan)
+    duplicated = df.duplicated(subset=keys + ["frame_id", "pedestrian_id"], keep="first")
+    add_issue(issues, "duplicate_ids", duplicated.to_numpy() & (pedestrian_ids >= 0), max_examples)
+
+    # Normalized coordinates, missing ones count as out of range
+    coords = df[COORD_COLUMNS].to_numpy(dtype=np.float64, na_value=np.nan)
+    add_issue(
+        issues,
+        "coords_out_of_range",
+        ~((coords >= 0) & (coords <= 1)).all(axis=1),
+        max_examples,
+    )
+    add_issue(
+        issues,
+        "inverted_box",
+        (coords[:, 2] < coords[:, 0]) | (coords[:, 3] < coords[:, 1]),
+        max_examples,
+    )
+
+    return issues
+
+
+def lint_sequence(df: pd.DataFrame, df_bbox: pd.DataFrame = None, max_examples: int = 20) -> dict:
+    """Check the sequences for incomplete and inverted intervals, and pedestrians without boxes in them."""
+
+    issues = {}
+    missing = [column for column in SEQUENCE_SCHEMA if column not in df.columns]
+    if missing:
+        return {"missing_columns": {"count": len(missing), "columns": missing}}
+
+    starts = df["start_frame"].to_numpy(dtype=np.float64, na_value=np.nan)
+    ends = df["end_frame"].to_numpy(dtype=np.float64, na_value=np.nan)
+    pedestrian_ids = df["pedestrian_id"].to_numpy(dtype=np.float64, na_value=np.nan)
+    incomplete = np.isnan(starts) | np.isnan(ends) | np.isnan(pedestrian_ids)
+    add_issue(issues, "incomplete_sequence", incomplete, max_examples)
+    add_issue(issues, "inverted_sequence", ends < starts, max_examples)
+
+    if df_bbox is None or any(column not in df_bbox.columns for column in BBOX_SCHEMA):
+        return issues
+
+    # Sort the boxes by video, camera, pedestrian and frame into one searchable key
+    keys = [column for column in KEY_COLUMNS if column in df.columns and column in df_bbox.columns]
+    codes_bbox, codes_sequence = encode_keys([df_bbox, df], keys + ["pedestrian_id"])
+    frames = df_bbox["frame_id"].to_numpy(dtype=np.float64, na_value=np.nan)
+    valid = ~np.isnan(frames) & (codes_bbox >= 0)
+    span = int(max(np.nanmax(frames, initial=0), np.nanmax(ends, initial=0))) + 2
+    box_keys = np.sort(codes_bbox[valid] * span + frames[valid].astype(np.int64))
+
+    # Count the boxes of each sequence's pedestrian within its interval, frames start at 0
+    checked = ~incomplete & (ends >= starts)
+    low = codes_sequence[checked] * span + np.maximum(starts[checked], 0).astype(np.int64)
+    high = codes_sequence[checked] * span + ends[checked].astype(np.int64)
+    counts = np.searchsorted(box_keys, high, side="right") - np.searchsorted(
+        box_keys, low, side="left"
+    )
+    orphan = np.zeros(len(df), dtype=bool)
+    orphan[np.flatnonzero(checked)[counts <= 0]] = True
+    add_issue(issues, "orphan_sequence", orphan, max_examples)
+
+    return issues
+
+
+def lint_pair(task: tuple) -> list:
+    """Lint a bounding box file and its sequence file, reading each once.
+
+    Returns:
+        list: Report entries of the files, with the row count, whether the rows were read from the 'csv' or the 'store', and the issues or the read error.
+    """
+
+    bbox_csv, sequence_csv, max_examples = task
+
+    entries = []
+    df_bbox = None
+    if bbox_csv is not None:
+        try:
+            df_bbox = read_labels(bbox_csv, BBOX_SCHEMA)
+            entries.append(
+                {
+                    "path": bbox_csv,
+                    "type": "bbox",
+                    "source": "store" if has_store(bbox_csv) else "csv",
+                    "rows": len(df_bbox),
+                    "issues": lint_bbox(df_bbox, max_examples),
+                }
+            )
+        except (OSError, ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            entries.append({"path": bbox_csv, "type": "bbox", "error": str(e)})
+    if sequence_csv is not None:
+        try:
+            df_sequence = read_labels(sequence_csv, SEQUENCE_SCHEMA)
+            entries.append(
+                {
+                    "path": sequence_csv,
+                    "type": "sequence",
+                    "source": "store" if has_store(sequence_csv) else "csv",
+                    "rows": len(df_sequence),
+                    "issues": lint_sequence(df_sequence, df_bbox, max_examples),
+                }
+            )
+        except (OSError, ValueError, pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+            entries.append({"path": sequence_csv, "type": "sequence", "error": str(e)})
+
+    return entries
+
+
+def lint_labels(
+    labels_folder_path: str,
+    output_path: str = None,
+    workers: int = None,
+    max_examples: int = 20,
+) -> dict:
+    """Lint every bounding box and sequence file of the labels folder in parallel.
+
+    Args:
+        labels_folder_path (str):   Path to the labels folder.
+        output_path (str):          Path to write the JSON report to. Defaults to printing it.
+        workers (int):              Number of worker processes. Defaults to the CPU count.
+        max_examples (int):         Row indices listed per issue and file.
+
+    Returns:
+        dict: The report, with the files, their issues and the issue totals.
+    """
+
+    if not os.path.isdir(labels_folder_path):
+        raise NotADirectoryError(f"'{labels_folder_path}' is not a directory.")
+
+    pairs = find_label_files(labels_folder_path)
+    if len(pairs) == 0:
+        raise FileNotFoundError(f"No label files found in '{labels_folder_path}'.")
+
+    # Lint the file pairs in parallel, largest first to balance the workers
+    tasks = [(bbox_csv, sequence_csv, max_examples) for bbox_csv, sequence_csv in pairs]
+    tasks.sort(
+        key=lambda task: -sum(
+            os.path.getsize(p) for p in task[:2] if p is not None and os.path.exists(p)
+        )
+    )
+    start_time = time.perf_counter()
+    files = []
+    with multiprocessing.Pool(processes=workers or os.cpu_count()) as pool:
+        progress = tqdm(total=len(tasks), desc="Linting", unit="files")
+        for entries in pool.imap_unordered(lint_pair, tasks):
+            files.extend(entries)
+            progress.update(1)
+        progress.close()
+    files.sort(key=lambda entry: entry["path"])
+
+    # Sum the issues over the files
+    totals = {}
+    for entry in files:
+        for check, issue in entry.get("issues", {}).items():
+            totals[check] = totals.get(check, 0) + issue["count"]
+    report = {
+        "labels_folder": os.path.abspath(labels_folder_path),
+        "seconds": round(time.perf_counter() - start_time, 3),
+        "totals": totals,
+        "errors": sum("error" in entry for entry in files),
+        "files": files,
+    }
+
+    if output_path is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(output_path, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved lint report to: {output_path}")
+
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Check every bounding box and sequence file of a labels folder."
+    )
+    parser.add_argument(
+        "--labels_folder",
+        type=str,
+        help="Path to the labels folder.",
+        required=True,
+    )
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Path to write the JSON report to. Defaults to printing it.",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Number of worker processes."
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/lint_labels.py \
+        --labels_folder ../data/realworldgestures/labels \
+        --output lint_report.json
+    """
+
+    report = lint_labels(args.labels_folder, args.output, args.workers)
+
+    # Fail if any issue or unreadable file was found, eg. for checks before a commit
+    sys.exit(1 if report["totals"] or report["errors"] else 0)
@@ -4,6 +4,11 @@ from skimage.metrics import structural_similarity as ssim
 from tqdm import tqdm
 import numpy as np
 import pandas as pd
+import sys
+
+sys.path.append(".")
+from src.video_index import VideoIndex
+from src.catalog import open_catalog, list_files
 
 def find_frame_in_video(frame: np.ndarray, video_path: str) -> int:
     """ Find the frame in a video that matches the given frame.
@@ -97,12 +102,12 @@ def get_lookup_videos(original_videos_dir: str) -> list:
         list: List of original video paths.
     """
 
-    # Scrape videos (Add containing "front" in sub folders) 
+    # Scrape videos from the catalog of the dir or the dataset above it (Add containing "front" in sub folders) 
+    open_catalog(original_videos_dir)
     original_videos = [
-        os.path.join(root, file)
-        for root, _, files in os.walk(original_videos_dir)
-        for file in files
-        if (file.endswith(('.mp4', '.avi', '.mov', '.MP4'))
+        video_path
+        for video_path in list_files(original_videos_dir, recursive=True)
+        if (video_path.endswith(('.mp4', '.avi', '.mov', '.MP4'))
             # and "front" in file
         )
     ]
@@ -111,11 +116,12 @@ def get_lookup_videos(original_videos_dir: str) -> list:
         
     return original_videos
 
-def get_start_end_frame(target_cap: cv2.VideoCapture) -> tuple:
+def get_start_end_frame(target_cap: cv2.VideoCapture, video_index: VideoIndex = None) -> tuple:
     """ Get the start and end frames of a video.
     
     Args:
         target_cap (str): Path to the target video file.
+        video_index (VideoIndex): Index of the target video, to seek the exact last frame.
         
     Return:
         tuple: Start and end frames of the video.
@@ -127,7 +133,13 @@ def get_start_end_frame(target_cap: cv2.VideoCapture) -> tuple:
     if start_frame is None:
         raise ValueError(f"Failed to read the 'first' frame.")
     
-    # Retrieve the last frame of the video
+    # Retrieve the last frame of the video from the exact frame count
+    if video_index is not None and video_index.frame_count > 0:
+        video_index.seek(target_cap, video_index.frame_count - 1)
+        ret, frame = target_cap.read()
+        if ret and frame is not None:
+            return start_frame, frame
+    
     # Set to the last frame (indexing starts at 0)
     estimated_total = int(target_cap.get(cv2.CAP_PROP_FRAME_COUNT))
     
@@ -175,7 +187,7 @@ def retrieve_frame(target_video: str, original_videos_dir: str, csv_helper_path:
 
     # Open the target video
     target_cap = cv2.VideoCapture(target_video)
-    start_frame, last_frame = get_start_end_frame(target_cap)
+    start_frame, last_frame = get_start_end_frame(target_cap, VideoIndex.load(target_video))
     target_cap.release()
     
     # Initialize data dictionary
@@ -1,56 +1,166 @@
 import os
+import sys
+import time
+import numpy as np
 import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(".")
+from src.label_store import read_labels
+from src.label_schema import BBOX_SCHEMA, SEQUENCE_SCHEMA, STRETCHED_SCHEMA, apply_schema
+from src.interval_join import join_sequences
+from src.track_store import build_tracks, write_track_store, get_track_store_path
+
+JOIN_KEYS = ["video_name", "pedestrian_id"]
+SORT_KEYS = ["video_name", "gesture_label_id", "frame_id", "pedestrian_id"]
+
+
+def stretch_partition(seq_df: pd.DataFrame, bbox_df: pd.DataFrame) -> pd.DataFrame:
+    """Label the bounding boxes of whole videos with the gesture of their sequence.
+
+    Each box is joined with the sequence of its pedestrian covering its frame,
+    the first one in the file if sequences overlap, without expanding the
+    sequences into frames. Boxes outside every sequence are dropped.
+    """
+
+    rows = join_sequences(bbox_df, seq_df, keys=JOIN_KEYS)
+    matched = rows >= 0
+
+    # Same columns as merging the stretched sequences with the boxes
+    merged_df = bbox_df.iloc[np.flatnonzero(matched)].reset_index(drop=True)
+    merged_df["gesture_label_id"] = seq_df["gesture_label_id"].iloc[rows[matched]].to_numpy()
+    columns = ["video_name", "frame_id", "pedestrian_id", "gesture_label_id"]
+    merged_df = merged_df[columns + [c for c in merged_df.columns if c not in columns]]
+    merged_df = apply_schema(merged_df, STRETCHED_SCHEMA)
+
+    return merged_df.sort_values(by=SORT_KEYS, kind="stable")
+
+
+def get_partitions(seq_df: pd.DataFrame, bbox_df: pd.DataFrame, chunk_rows: int) -> list:
+    """Group the videos in both files into partitions of about 'chunk_rows' bounding boxes, in output order.
+
+    Returns:
+        list: Row positions of each partition in the sequence and bounding box DataFrames.
+    """
+
+    seq_parts = seq_df.groupby(seq_df["video_name"].astype(str), observed=True).indices
+    bbox_parts = bbox_df.groupby(bbox_df["video_name"].astype(str), observed=True).indices
+
+    # Whole videos only, small ones together to limit the overhead per partition
+    partitions, video_names, rows = [], [], 0
+    for video_name in sorted(seq_parts.keys() & bbox_parts.keys()):
+        video_names.append(video_name)
+        rows += len(bbox_parts[video_name])
+        if rows >= chunk_rows:
+            partitions.append(video_names)
+            video_names, rows = [], 0
+    if video_names:
+        partitions.append(video_names)
+
+    return [
+        (
+            np.concatenate([seq_parts[name] for name in names]),
+            np.concatenate([bbox_parts[name] for name in names]),
+        )
+        for names in partitions
+    ]
+
+
+def stretch_sequence(
+    sequence_csv: str, bbox_csv: str, chunk_rows: int = 1_000_000, track_store: bool = False
+):
+    """Stretch sequences from frame-stamp to individual frames. Merge with bounding boxes.
+
+    Whole videos are joined a partition at a time and appended to the output
+    file, so the memory use is bounded by the partition instead of the dataset.
+    The join grows with the number of boxes, not with the sequence lengths.
+
+    Args:
+        sequence_csv (str): Path to the sequence CSV file, ending with 'sequence.csv'.
+        bbox_csv (str):     Path to the bounding box CSV file.
+        chunk_rows (int):   Bounding boxes per partition, larger videos form their own.
+        track_store (bool): Also write the tracks next to the output file, see 'src/track_store.py'.
+    """
 
-def stretch_sequence(sequence_csv: str, bbox_csv: str):
-    """ Stretch sequences from frame-stamp to individual frames. Merge with bounding boxes. """
-    
     # Check if the CSV file and video folder exist
     for csv_file in [sequence_csv, bbox_csv]:
         if not os.path.exists(csv_file):
             raise FileNotFoundError(f"CSV file {csv_file} does not exist.")
         if not os.path.isfile(csv_file):
             raise NotADirectoryError(f"CSV file {csv_file} is not a file.")
-    
+
     # Load the CSV file
-    seq_df = pd.read_csv(sequence_csv, index_col=False) if os.path.exists(sequence_csv) else None
-    bbox_df = pd.read_csv(bbox_csv, index_col=False) if os.path.exists(bbox_csv) else None
+    seq_df = read_labels(sequence_csv, SEQUENCE_SCHEMA) if os.path.exists(sequence_csv) else None
+    bbox_df = read_labels(bbox_csv, BBOX_SCHEMA) if os.path.exists(bbox_csv) else None
     if seq_df.empty or bbox_df.empty:
         print("Error: One or both CSV files are empty.")
         return
-    
-    # Expand each row in sequence.csv into individual frames
-    expanded_rows = []
-    for _, row in seq_df.iterrows():
-        for frame_id in range(row["start_frame"], row["end_frame"] + 1):
-            expanded_rows.append({
-                "video_name": row["video_name"],
-                "frame_id": frame_id,
-                "pedestrian_id": row["pedestrian_id"],
-                "gesture_label_id": row["gesture_label_id"]
-            })
-    expanded_df = pd.DataFrame(expanded_rows)
-
-    # Merge with bbox detections
-    merged_df = pd.merge(
-        expanded_df,
-        bbox_df,
-        on=["video_name", "frame_id", "pedestrian_id"],
-        how="inner"  # Only keep matches
-    )
-    if merged_df.empty:
+
+    # Stream each partition's stretched rows to the output file
+    output_csv = sequence_csv.replace("sequence.csv", "stretched.csv")
+    start_time = time.perf_counter()
+    written = 0
+    tracks = []
+    with open(output_csv, "w", newline="") as f:
+        for seq_rows, bbox_rows in tqdm(
+            get_partitions(seq_df, bbox_df, chunk_rows), desc="Stretching", unit="partitions"
+        ):
+            merged_df = stretch_partition(seq_df.iloc[seq_rows], bbox_df.iloc[bbox_rows])
+            if merged_df.empty:
+                continue
+            merged_df.to_csv(f, header=written == 0, index=False)
+            written += len(merged_df)
+
+            # Partitions hold whole videos, so no track spans two of them
+            if track_store:
+                tracks.append(build_tracks(merged_df))
+
+    if written == 0:
+        os.remove(output_csv)
         print("Error: No matches found between the two CSV files.")
         return
 
-    # Optional: sort
-    merged_df = merged_df.sort_values(by=["video_name", "gesture_label_id", "frame_id", "pedestrian_id"])
-    
-    # Save result
-    output_csv = sequence_csv.replace("sequence.csv", "stretched.csv")
-    merged_df.to_csv(output_csv, index=False)
-    print(f"Saved stretched annotations to: {output_csv}")
+    # Report the throughput
+    elapsed = time.perf_counter() - start_time
+    rows_per_second = written / elapsed if elapsed > 0 else 0.0
+    print(f"Saved {written} stretched annotations to: {output_csv} ({rows_per_second:.0f} rows/s)")
+
+    if track_store:
+        store_path = get_track_store_path(output_csv)
+        write_track_store(tracks, store_path)
+        print(f"Saved {sum(len(part['lengths']) for part in tracks)} tracks to: {store_path}")
+
 
 if __name__ == "__main__":
-    # Example usage
-    sequence_csv = "data/labels/actedgestures_sequence.csv"
-    bbox_csv = "data/labels/actedgestures_bbox.csv"
-    stretch_sequence(sequence_csv, bbox_csv)
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Stretch the sequence labels over the bounding boxes of their frames."
+    )
+    parser.add_argument(
+        "--sequence_csv",
+        type=str,
+        default="data/labels/actedgestures_sequence.csv",
+        help="Path to the sequence CSV file.",
+    )
+    parser.add_argument(
+        "--bbox_csv",
+        type=str,
+        default="data/labels/actedgestures_bbox.csv",
+        help="Path to the bounding box CSV file.",
+    )
+    parser.add_argument(
+        "--track_store",
+        action="store_true",
+        help="Also write the tracks to a '*stretched.tracks.npz' store.",
+    )
+    args = parser.parse_args()
+
+    # Example usage:
+    """
+    python scripts/stretch_sequence.py \
+        --sequence_csv data/labels/actedgestures_sequence.csv \
+        --bbox_csv data/labels/actedgestures_bbox.csv
+    """
+
+    stretch_sequence(args.sequence_csv, args.bbox_csv, track_store=args.track_store)
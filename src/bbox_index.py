@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+from src.interval_join import join_sequences
+
+
+class BboxIndex:
+    """Per-frame index of bounding boxes, built once when a video is loaded.
+
+    Rows are sorted by 'frame_id' and stored in contiguous NumPy arrays. A sorted
+    array of unique frame IDs with offsets into those arrays turns every per-frame
+    lookup into a binary search and a single slice.
+
+    Given the sequences too, the active sequence row of every box is joined once
+    up front, instead of being looked up per box and frame while drawing.
+    """
+
+    COORD_COLUMNS = ["x1", "y1", "x2", "y2"]
+
+    def __init__(self, df_bbox: pd.DataFrame = None, df_sequence: pd.DataFrame = None):
+        self.sequence_rows = None
+
+        # Empty index if no bounding boxes are given
+        if df_bbox is None or df_bbox.empty:
+            self.frame_ids = np.empty(0, dtype=np.int64)
+            self.offsets = np.zeros(1, dtype=np.int64)
+            self.pedestrian_ids = np.empty(0, dtype=np.int64)
+            self.coords = np.empty((0, 4), dtype=np.float32)
+            return
+
+        # Sort rows by frame, keeping the file order within a frame
+        frame_ids = df_bbox["frame_id"].to_numpy(dtype=np.int64)
+        order = np.argsort(frame_ids, kind="stable")
+        frame_ids = frame_ids[order]
+
+        # Contiguous arrays of IDs and normalized coordinates
+        self.pedestrian_ids = df_bbox["pedestrian_id"].to_numpy(dtype=np.int64)[order]
+        self.coords = np.ascontiguousarray(
+            df_bbox[self.COORD_COLUMNS].to_numpy(dtype=np.float32)[order]
+        )
+
+        # Unique frame IDs and the offset of their first row
+        self.frame_ids, starts = np.unique(frame_ids, return_index=True)
+        self.offsets = np.append(starts, len(frame_ids)).astype(np.int64)
+
+        # Sequence row of each box, by pedestrian ID like 'SequenceIndex'
+        if df_sequence is not None and not df_sequence.empty:
+            self.sequence_rows = join_sequences(
+                df_bbox, df_sequence.reset_index(drop=True), keys=["pedestrian_id"]
+            )[order]
+
+    def __len__(self) -> int:
+        return len(self.pedestrian_ids)
+
+    def lookup(self, frame_id: int) -> tuple:
+        """Get the pedestrian IDs and normalized coordinates for a frame.
+
+        Args:
+            frame_id (int): Frame ID to look up.
+
+        Returns:
+            tuple: Pedestrian IDs (N,) and normalized coordinates (N, 4). Empty if the frame has no boxes.
+        """
+
+        # Binary search for the frame
+        i = np.searchsorted(self.frame_ids, frame_id)
+        if i >= len(self.frame_ids) or self.frame_ids[i] != frame_id:
+            return self.pedestrian_ids[:0], self.coords[:0]
+
+        # Slice the rows of the frame
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.pedestrian_ids[start:end], self.coords[start:end]
+
+    def lookup_sequence_rows(self, frame_id: int) -> np.ndarray:
+        """Get the joined sequence rows of the boxes of a frame, -1 if none, or None if not joined."""
+
+        if self.sequence_rows is None:
+            return None
+
+        i = np.searchsorted(self.frame_ids, frame_id)
+        if i >= len(self.frame_ids) or self.frame_ids[i] != frame_id:
+            return self.sequence_rows[:0]
+
+        return self.sequence_rows[self.offsets[i] : self.offsets[i + 1]]
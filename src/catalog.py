@@ -0,0 +1,357 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import cv2
+from src.video_index import VideoIndex
+
+
+class Catalog:
+    """Persistent SQLite catalog of the files and folders under a root folder.
+
+    Folder modification times tell which folders gained, lost or renamed entries,
+    so a refresh only lists the changed folders again, and stats the known files
+    of the others to notice files overwritten in place. Queries then answer from
+    the database instead of walking the tree, which is slow on network storage
+    with thousands of clips, after refreshing the folder they look in if it was
+    not refreshed recently. Video frame rates and frame counts are probed once
+    and kept until the file changes.
+    """
+
+    def __init__(self, root: str, db_path: str = None, max_age: float = 2.0):
+        """
+        Args:
+            root (str):         Folder to catalog, eg. the main folder of the dataset.
+            db_path (str):      Path to the database. Defaults to 'catalog.sqlite' in a hidden '.index' folder in the root.
+            max_age (float):    Seconds a refreshed folder is trusted before queries refresh it again. None to never refresh on queries.
+        """
+
+        self.root = os.path.normpath(os.path.abspath(root))
+        self.db_path = db_path or os.path.join(self.root, ".index", "catalog.sqlite")
+        self.max_age = max_age
+        self._refreshed = {}
+
+        # Keep the catalog in memory on read-only storage
+        try:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._db = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._create_tables()
+        except (OSError, sqlite3.Error) as e:
+            print(f"Warning: Could not open catalog '{self.db_path}': {e}")
+            self._db = sqlite3.connect(":memory:", check_same_thread=False)
+            self._create_tables()
+        self._lock = threading.Lock()
+
+    def _create_tables(self) -> None:
+        with self._db:
+            self._db.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS dirs (
+                    path TEXT PRIMARY KEY, parent TEXT, mtime REAL
+                );
+                CREATE TABLE IF NOT EXISTS files (
+                    path TEXT PRIMARY KEY, dir TEXT, name TEXT, size INTEGER, mtime REAL,
+                    fps REAL, frame_count INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+                CREATE INDEX IF NOT EXISTS files_dir ON files (dir);
+                """
+            )
+
+    def refresh(self, dir_path: str = None) -> None:
+        """Bring the catalog up to date, listing again only the folders changed since the last refresh.
+
+        Args:
+            dir_path (str): Folder inside the root to refresh with its sub folders. Defaults to the root.
+        """
+
+        start = self.root if dir_path is None else os.path.normpath(os.path.abspath(dir_path))
+        refreshed_at = time.monotonic()
+        with self._lock, self._db:
+            known = dict(
+                self._db.execute(
+                    "SELECT path, mtime FROM dirs WHERE path = ? OR substr(path, 1, ?) = ?",
+                    (start, len(start) + 1, start + os.sep),
+                )
+            )
+            seen = set()
+            stack = [start]
+            while stack:
+                dir_path = stack.pop()
+                try:
+                    mtime = os.stat(dir_path).st_mtime
+                except OSError:
+                    continue
+                seen.add(dir_path)
+
+                # Unchanged entries, check the known files and continue with the known sub folders
+                if known.get(dir_path) == mtime:
+                    self._restat_files(dir_path)
+                    stack.extend(
+                        path
+                        for (path,) in self._db.execute(
+                            "SELECT path FROM dirs WHERE parent = ?", (dir_path,)
+                        )
+                    )
+                    continue
+
+                # List the folder, skipping hidden folders like the '.index' sidecars
+                files, sub_dirs = [], []
+                try:
+                    for entry in os.scandir(dir_path):
+                        if entry.is_dir():
+                            if not entry.name.startswith("."):
+                                sub_dirs.append(os.path.join(dir_path, entry.name))
+                        elif entry.is_file():
+                            stat = entry.stat()
+                            files.append(
+                                (entry.path, dir_path, entry.name, stat.st_size, stat.st_mtime)
+                            )
+                except OSError as e:
+                    print(f"Warning: Could not list '{dir_path}': {e}")
+                    continue
+
+                # Drop the removed files, keep the probed video info of unchanged ones
+                self._db.execute(
+                    "DELETE FROM files WHERE dir = ? AND path NOT IN (SELECT value FROM json_each(?))",
+                    (dir_path, json.dumps([f[0] for f in files])),
+                )
+                self._db.executemany(
+                    """
+                    INSERT INTO files (path, dir, name, size, mtime) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (path) DO UPDATE SET
+                        size = excluded.size,
+                        fps = CASE WHEN mtime = excluded.mtime AND size = excluded.size
+                            THEN fps END,
+                        frame_count = CASE WHEN mtime = excluded.mtime AND size = excluded.size
+                            THEN frame_count END,
+                        mtime = excluded.mtime
+                    """,
+                    files,
+                )
+
+                # A folder changed within the timestamp resolution may change again unnoticed
+                if time.time() - mtime < 2:
+                    mtime = None
+                self._db.execute(
+                    "INSERT OR REPLACE INTO dirs (path, parent, mtime) VALUES (?, ?, ?)",
+                    (dir_path, os.path.dirname(dir_path) if dir_path != self.root else None, mtime),
+                )
+                stack.extend(sub_dirs)
+
+            # Remove the folders that are gone
+            for dir_path in known.keys() - seen:
+                self._db.execute("DELETE FROM dirs WHERE path = ?", (dir_path,))
+                self._db.execute("DELETE FROM files WHERE dir = ?", (dir_path,))
+        self._refreshed[start] = refreshed_at
+
+    def _refresh_stale(self, dir_path: str) -> None:
+        """Refresh the folder, unless it or a folder above it was refreshed within 'max_age' seconds."""
+
+        if self.max_age is None:
+            return
+
+        dir_path = os.path.normpath(os.path.abspath(dir_path))
+        now = time.monotonic()
+        path = dir_path
+        while True:
+            if now - self._refreshed.get(path, -self.max_age) < self.max_age:
+                return
+            if path == self.root or path == os.path.dirname(path):
+                break
+            path = os.path.dirname(path)
+
+        self.refresh(dir_path)
+
+    def _restat_files(self, dir_path: str) -> None:
+        """Update the known files of an unchanged folder, forgetting the video info of changed ones."""
+
+        for path, size, mtime in self._db.execute(
+            "SELECT path, size, mtime FROM files WHERE dir = ?", (dir_path,)
+        ).fetchall():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self._db.execute("DELETE FROM files WHERE path = ?", (path,))
+                continue
+            if (stat.st_size, stat.st_mtime) != (size, mtime):
+                self._db.execute(
+                    "UPDATE files SET size = ?, mtime = ?, fps = NULL, frame_count = NULL WHERE path = ?",
+                    (stat.st_size, stat.st_mtime, path),
+                )
+
+    def contains(self, path: str) -> bool:
+        """Check if the path is inside the root folder."""
+
+        path = os.path.normpath(os.path.abspath(path))
+        return path == self.root or path.startswith(self.root + os.sep)
+
+    def list_files(self, dir_path: str, recursive: bool = False) -> list:
+        """Get the file paths in the folder, sorted, in the form of the given folder path."""
+
+        dir_abs = os.path.normpath(os.path.abspath(dir_path))
+        self._refresh_stale(dir_abs)
+        with self._lock:
+            if recursive:
+                rows = self._db.execute(
+                    "SELECT path FROM files WHERE dir = ? OR substr(dir, 1, ?) = ? ORDER BY path",
+                    (dir_abs, len(dir_abs) + 1, dir_abs + os.sep),
+                ).fetchall()
+            else:
+                rows = self._db.execute(
+                    "SELECT path FROM files WHERE dir = ? ORDER BY path", (dir_abs,)
+                ).fetchall()
+
+        return [os.path.join(dir_path, os.path.relpath(path, dir_abs)) for (path,) in rows]
+
+    def list_dirs(self, dir_path: str) -> list:
+        """Get the sub folder paths of the folder, sorted, in the form of the given folder path."""
+
+        dir_abs = os.path.normpath(os.path.abspath(dir_path))
+        self._refresh_stale(dir_abs)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT path FROM dirs WHERE parent = ? ORDER BY path", (dir_abs,)
+            ).fetchall()
+
+        return [os.path.join(dir_path, os.path.basename(path)) for (path,) in rows]
+
+    def exists(self, path: str) -> bool:
+        """Check if the file or folder exists, refreshing the folder it is in if stale."""
+
+        path = os.path.normpath(os.path.abspath(path))
+        self._refresh_stale(path if path == self.root else os.path.dirname(path))
+        with self._lock:
+            return (
+                self._db.execute("SELECT 1 FROM files WHERE path = ?", (path,)).fetchone()
+                is not None
+                or self._db.execute("SELECT 1 FROM dirs WHERE path = ?", (path,)).fetchone()
+                is not None
+            )
+
+    def video_info(self, video_path: str) -> tuple:
+        """Get the frame rate and frame count of a video, probing it only once per change.
+
+        Returns:
+            tuple: Frame rate as reported by OpenCV, and the exact frame count of the video index.
+        """
+
+        path = os.path.normpath(os.path.abspath(video_path))
+        with self._lock:
+            row = self._db.execute(
+                "SELECT fps, frame_count FROM files WHERE path = ?", (path,)
+            ).fetchone()
+        if row is not None and row[0] is not None:
+            return row
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            raise FileNotFoundError(f"Could not open video {video_path}.")
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        cap.release()
+
+        # The container's frame count is an estimate, the index counts the frames
+        frame_count = VideoIndex.load(video_path).frame_count
+
+        with self._lock, self._db:
+            self._db.execute(
+                "UPDATE files SET fps = ?, frame_count = ? WHERE path = ?",
+                (fps, frame_count, path),
+            )
+
+        return fps, frame_count
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+_catalogs = {}
+_catalogs_lock = threading.Lock()
+
+
+def find_catalog_root(path: str) -> str:
+    """Get the nearest folder at or above the path with a catalog database, eg. the main folder of the dataset, or None."""
+
+    path = os.path.normpath(os.path.abspath(path))
+    while True:
+        if os.path.isfile(os.path.join(path, ".index", "catalog.sqlite")):
+            return path
+        if path == os.path.dirname(path):
+            return None
+        path = os.path.dirname(path)
+
+
+def open_catalog(root: str, refresh: bool = True) -> Catalog:
+    """Open the catalog answering for the folder, once per process, and use it in the helpers below.
+
+    An open catalog containing the folder is reused. Otherwise the nearest catalog
+    at or above the folder is opened, eg. the one of the dataset built by
+    'scripts/build_catalog.py', or else a new one rooted at the folder.
+
+    Args:
+        root (str):     Folder to catalog.
+        refresh (bool): Bring the catalog up to date when first opened.
+
+    Returns:
+        Catalog: The catalog containing the folder.
+    """
+
+    catalog = find_catalog(root)
+    if catalog is not None:
+        return catalog
+
+    root = find_catalog_root(root) or os.path.normpath(os.path.abspath(root))
+    with _catalogs_lock:
+        if root not in _catalogs:
+            catalog = Catalog(root)
+            if refresh:
+                catalog.refresh()
+            _catalogs[root] = catalog
+        return _catalogs[root]
+
+
+def find_catalog(path: str) -> Catalog:
+    """Get the open catalog with the innermost root containing the path, or None."""
+
+    with _catalogs_lock:
+        catalogs = [catalog for catalog in _catalogs.values() if catalog.contains(path)]
+
+    return max(catalogs, key=lambda catalog: len(catalog.root), default=None)
+
+
+def list_files(dir_path: str, recursive: bool = False) -> list:
+    """Get the file paths in the folder, from an open catalog or else from the file system."""
+
+    catalog = find_catalog(dir_path)
+    if catalog is not None:
+        return catalog.list_files(dir_path, recursive)
+
+    if recursive:
+        return sorted(
+            os.path.join(root, file)
+            for root, _, files in os.walk(dir_path)
+            for file in files
+        )
+    return sorted(f.path for f in os.scandir(dir_path) if f.is_file())
+
+
+def list_dirs(dir_path: str) -> list:
+    """Get the sub folder paths of the folder, from an open catalog or else from the file system."""
+
+    catalog = find_catalog(dir_path)
+    if catalog is not None:
+        return catalog.list_dirs(dir_path)
+
+    return sorted(f.path for f in os.scandir(dir_path) if f.is_dir())
+
+
+def path_exists(path: str) -> bool:
+    """Check if the path exists, from an open catalog or else from the file system."""
+
+    catalog = find_catalog(path)
+    if catalog is not None:
+        return catalog.exists(path)
+
+    return os.path.exists(path)
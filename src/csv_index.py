@@ -0,0 +1,176 @@
+import io
+import os
+import numpy as np
+import pandas as pd
+from src.label_schema import LABEL_SCHEMA, read_csv_typed
+
+
+def get_csv_index_path(csv_path: str) -> str:
+    """Get the sidecar row index path of a CSV file, in a hidden '.index' folder next to it."""
+
+    csv_dir, csv_file = os.path.split(os.path.abspath(csv_path))
+    return os.path.join(csv_dir, ".index", os.path.splitext(csv_file)[0] + ".rows.npz")
+
+
+class CsvRowIndex:
+    """Byte ranges of the rows of a large label CSV file, grouped by their key columns.
+
+    Consecutive rows with the same keys, eg. the same video name and camera, form
+    a run with one byte range. Reading the rows of one video then seeks to its
+    runs and parses only those bytes, instead of the whole file.
+    """
+
+    def __init__(
+        self, header: bytes, columns: list, keys: np.ndarray, starts: np.ndarray, ends: np.ndarray
+    ):
+        """
+        Args:
+            header (bytes):     Header line of the CSV file.
+            columns (list):     Key columns of the runs.
+            keys (np.ndarray):  Key values of each run as text (M, K).
+            starts (np.ndarray): Byte offset of the first row of each run (M,).
+            ends (np.ndarray):  Byte offset after the last row of each run (M,).
+        """
+
+        self.header = header
+        self.columns = list(columns)
+        self.keys = keys
+        self.starts = starts
+        self.ends = ends
+
+    @classmethod
+    def build(cls, csv_path: str, key_columns: list, chunk_bytes: int = 64 * 1024**2):
+        """Scan the CSV file in chunks for the byte ranges of the runs.
+
+        Args:
+            csv_path (str):     Path to the CSV file.
+            key_columns (list): Columns to group the rows by, missing ones are skipped.
+            chunk_bytes (int):  Bytes parsed at a time, bounding the memory use.
+
+        Returns:
+            CsvRowIndex: The index, or None if rows do not map to lines, eg. quoted line breaks or blank lines.
+        """
+
+        with open(csv_path, "rb") as f:
+            header = f.readline()
+            columns = [
+                column
+                for column in key_columns
+                if column in pd.read_csv(io.BytesIO(header), nrows=0).columns
+            ]
+            if len(columns) == 0:
+                return None
+
+            keys, starts, ends = [], [], []
+            offset, rest = len(header), b""
+            while True:
+                data = f.read(chunk_bytes)
+                chunk = rest + data
+
+                # Parse whole lines only, keep the rest for the next chunk
+                cut = chunk.rfind(b"\n") + 1 if data else len(chunk)
+                chunk, rest = chunk[:cut], chunk[cut:]
+                if not chunk:
+                    break
+                if not chunk.endswith(b"\n"):
+                    chunk += b"\n"  # Last line without a line break
+
+                # Byte range of every line, one per row
+                line_ends = np.flatnonzero(np.frombuffer(chunk, dtype=np.uint8) == ord("\n")) + 1
+                line_starts = np.append(0, line_ends[:-1])
+                rows = pd.read_csv(
+                    io.BytesIO(header + chunk), usecols=columns, dtype=str, keep_default_na=False
+                )
+                if len(rows) != len(line_ends):
+                    return None
+
+                # Split the chunk into runs of equal keys
+                values = rows[columns].to_numpy(dtype=str)
+                changes = np.append(True, (values[1:] != values[:-1]).any(axis=1))
+                run_starts = np.flatnonzero(changes)
+                run_ends = np.append(run_starts[1:], len(values)) - 1
+                keys.append(values[run_starts])
+                starts.append(offset + line_starts[run_starts])
+                ends.append(offset + line_ends[run_ends])
+
+                offset += len(chunk)
+
+        if len(keys) == 0:
+            keys = [np.empty((0, len(columns)), dtype=str)]
+            starts = ends = [np.empty(0, dtype=np.int64)]
+
+        return cls(
+            header, columns, np.concatenate(keys), np.concatenate(starts), np.concatenate(ends)
+        )
+
+    @classmethod
+    def load(cls, csv_path: str, key_columns: list, rebuild: bool = False):
+        """Load the sidecar row index of a CSV file, scanning the file if missing or outdated.
+
+        Returns:
+            CsvRowIndex: The index, or None if the file cannot be indexed.
+        """
+
+        # Reuse the sidecar if newer than the CSV file and grouped by the same columns
+        index_path = get_csv_index_path(csv_path)
+        if (
+            not rebuild
+            and os.path.exists(index_path)
+            and os.path.getmtime(index_path) >= os.path.getmtime(csv_path)
+        ):
+            with np.load(index_path, allow_pickle=False) as data:
+                if data["key_columns"].tolist() == list(key_columns):
+                    return cls(
+                        data["header"].tobytes(),
+                        data["columns"].tolist(),
+                        data["keys"],
+                        data["starts"],
+                        data["ends"],
+                    )
+
+        row_index = cls.build(csv_path, key_columns)
+        if row_index is None:
+            return None
+
+        # Write the sidecar, keep the index in memory on read-only storage
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            np.savez(
+                index_path,
+                key_columns=np.array(key_columns, dtype=str),
+                header=np.frombuffer(row_index.header, dtype=np.uint8),
+                columns=np.array(row_index.columns, dtype=str),
+                keys=row_index.keys,
+                starts=row_index.starts,
+                ends=row_index.ends,
+            )
+        except OSError as e:
+            print(f"Warning: Could not write CSV row index '{index_path}': {e}")
+
+        return row_index
+
+    def select(self, video_name: str, csv_keys: list = ["video_name", "camera"]) -> np.ndarray:
+        """Get the runs that may hold the rows of the video, by the same key as 'filter_df'."""
+
+        split_clip = video_name.split("/")
+
+        # Match on the most specific key available, as text
+        for col, key in reversed(list(zip(csv_keys, split_clip))):
+            if col not in self.columns or key is None:
+                continue
+            return np.flatnonzero(self.keys[:, self.columns.index(col)] == key.lower())
+
+        return np.arange(len(self.starts))
+
+    def read(self, csv_path: str, runs: np.ndarray, schema: dict = LABEL_SCHEMA) -> pd.DataFrame:
+        """Read and parse only the byte ranges of the runs, with the column types of the schema."""
+
+        buffer = io.BytesIO()
+        buffer.write(self.header)
+        with open(csv_path, "rb") as f:
+            for run in runs:
+                f.seek(self.starts[run])
+                buffer.write(f.read(self.ends[run] - self.starts[run]))
+        buffer.seek(0)
+
+        return read_csv_typed(buffer, schema)
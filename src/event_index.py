@@ -0,0 +1,83 @@
+import sys
+import numpy as np
+
+sys.path.append(".")
+from src.bbox_index import BboxIndex
+from src.sequence_index import SequenceIndex
+
+
+class EventIndex:
+    """Sorted frame IDs of annotation events, for jumping to the next or previous one.
+
+    Built once from the bounding box and sequence indexes of a video:
+        - 'sequence':   Start and end frames of the annotated sequences.
+        - 'track':      Frames where a pedestrian ID appears, or is gone after its last box.
+        - 'duplicate':  Frames with the same pedestrian ID more than once.
+
+    Every jump is a binary search in the sorted array of the event type.
+    """
+
+    EVENTS = ("sequence", "track", "duplicate")
+
+    def __init__(self, bbox_index: BboxIndex = None, sequence_index: SequenceIndex = None):
+        self.events = {event: np.empty(0, dtype=np.int64) for event in self.EVENTS}
+
+        if bbox_index is not None and len(bbox_index) > 0:
+            self._index_bboxes(bbox_index)
+        if sequence_index is not None and len(sequence_index) > 0:
+            self._index_sequences(sequence_index)
+
+    def _index_bboxes(self, bbox_index: BboxIndex) -> None:
+        """Find the track and duplicate events from the rows of the bounding box index."""
+
+        # Sort the rows by pedestrian, then frame
+        frame_ids = np.repeat(bbox_index.frame_ids, np.diff(bbox_index.offsets))
+        pedestrian_ids = bbox_index.pedestrian_ids
+        order = np.lexsort((frame_ids, pedestrian_ids))
+        frame_ids, pedestrian_ids = frame_ids[order], pedestrian_ids[order]
+
+        # Rows repeating the previous pedestrian and frame are duplicates
+        same_pedestrian = pedestrian_ids[1:] == pedestrian_ids[:-1]
+        repeated = same_pedestrian & (frame_ids[1:] == frame_ids[:-1])
+        self.events["duplicate"] = np.unique(frame_ids[1:][repeated])
+
+        # Tracks start at a new pedestrian or after a gap, and are gone after their last frame
+        keep = np.append(True, ~repeated)
+        frame_ids, pedestrian_ids = frame_ids[keep], pedestrian_ids[keep]
+        new_run = np.append(
+            True,
+            (pedestrian_ids[1:] != pedestrian_ids[:-1]) | (frame_ids[1:] - frame_ids[:-1] > 1),
+        )
+        run_ends = np.append(new_run[1:], True)
+        self.events["track"] = np.unique(
+            np.concatenate([frame_ids[new_run], frame_ids[run_ends] + 1])
+        )
+
+    def _index_sequences(self, sequence_index: SequenceIndex) -> None:
+        """Find the sequence boundaries from the rows of the sequence index."""
+
+        df = sequence_index.df_sequence
+        frames = np.concatenate(
+            [df[column].dropna().to_numpy(dtype=np.int64) for column in ("start_frame", "end_frame")]
+        )
+        self.events["sequence"] = np.unique(frames)
+
+    def next(self, event: str, frame_id: int) -> int:
+        """Get the first frame of the event type after the frame, or None if none."""
+
+        frames = self.events[event]
+        i = np.searchsorted(frames, frame_id, side="right")
+        if i >= len(frames):
+            return None
+
+        return int(frames[i])
+
+    def previous(self, event: str, frame_id: int) -> int:
+        """Get the last frame of the event type before the frame, or None if none."""
+
+        frames = self.events[event]
+        i = np.searchsorted(frames, frame_id, side="left") - 1
+        if i < 0:
+            return None
+
+        return int(frames[i])
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import shutil
+import subprocess
+import tempfile
+import multiprocessing
+import cv2
+import pandas as pd
+from tqdm import tqdm
+
+sys.path.append(".")
+from src.bbox_index import BboxIndex
+from src.sequence_index import SequenceIndex
+from src.frame_reader import FramePrefetcher
+from src.video_index import VideoIndex
+from src.visualize_video_bbox import draw_pedestrians, draw_info
+from scripts.concat_videos_cluster import write_txt_file
+
+# State of each worker process, set once by the pool initializer
+_worker = {}
+
+
+def _init_worker(video_path, df_bbox, df_sequence, video_name, fps, size):
+    """Build the indexes once per worker process."""
+
+    # One decode thread per worker, the pool provides the parallelism
+    cv2.setNumThreads(1)
+
+    # Join the sequence of every box once, instead of per box while drawing
+    _worker.update(
+        video_path=video_path,
+        bbox_index=BboxIndex(df_bbox, df_sequence),
+        sequence_index=SequenceIndex(df_sequence),
+        video_name=video_name,
+        fps=fps,
+        size=size,
+    )
+
+
+def _export_chunk(task: tuple) -> int:
+    """Decode, draw and encode one chunk of frames to its own video file.
+
+    Args:
+        task (tuple): Start frame, end frame (exclusive) and path of the chunk file.
+
+    Returns:
+        int: Number of frames written.
+    """
+
+    start, end, chunk_path = task
+
+    # Decode ahead on a background thread while drawing and encoding
+    reader = FramePrefetcher(_worker["video_path"], cache_bytes=0)
+    writer = cv2.VideoWriter(
+        chunk_path, cv2.VideoWriter_fourcc(*"mp4v"), _worker["fps"], _worker["size"]
+    )
+
+    written = 0
+    for index in range(start, end):
+        frame = reader.read(index)
+        if frame is None:
+            break
+
+        # Same frame numbering as the viewer
+        frame_id = index + 1
+        frame = draw_pedestrians(
+            frame, _worker["bbox_index"], frame_id, _worker["sequence_index"]
+        )
+        frame = draw_info(frame, _worker["video_name"], frame_id)
+
+        writer.write(frame)
+        written += 1
+
+    writer.release()
+    reader.release()
+
+    return written
+
+
+def concat_chunks(chunk_paths: list, output_path: str, fps: float, size: tuple) -> None:
+    """Concatenate the chunk files with ffmpeg, or by re-encoding with OpenCV if ffmpeg is unavailable."""
+
+    # Stream copy with the ffmpeg concat demuxer
+    list_file = os.path.join(os.path.dirname(chunk_paths[0]), "file_list.txt")
+    list_file = write_txt_file(chunk_paths, list_file)
+    command = [
+        "ffmpeg",
+        "-y",
+        "-f",
+        "concat",
+        "-safe",
+        "0",
+        "-i",
+        list_file,
+        "-c",
+        "copy",
+        output_path,
+    ]
+    try:
+        subprocess.run(
+            command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        return
+    except (OSError, subprocess.CalledProcessError):
+        print("Warning: ffmpeg concat failed, re-encoding the chunks with OpenCV.")
+
+    # Fallback: decode and write the chunks one after another
+    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for chunk_path in chunk_paths:
+        cap = cv2.VideoCapture(chunk_path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            writer.write(frame)
+        cap.release()
+    writer.release()
+
+
+def export_video(
+    video_path: str,
+    df_bbox: pd.DataFrame,
+    df_sequence: pd.DataFrame,
+    output_path: str,
+    video_name: str = None,
+    workers: int = None,
+    chunk_size: int = 500,
+) -> float:
+    """Render the bounding boxes and labels to a video file without a display.
+
+    The frames are split into chunks, which worker processes decode, draw and
+    encode in parallel. The chunk files are concatenated into the output video.
+
+    Args:
+        video_path (str):           Path to the video file.
+        df_bbox (pd.DataFrame):     DataFrame containing bounding box information.
+        df_sequence (pd.DataFrame): DataFrame containing sequence information.
+        output_path (str):          Path to the output video file.
+        video_name (str):           Name of the video drawn on the frames.
+        workers (int):              Number of worker processes. Defaults to the CPU count.
+        chunk_size (int):           Number of frames per chunk.
+
+    Returns:
+        float: Exported frames per second.
+    """
+
+    if not os.path.isfile(video_path):
+        raise FileNotFoundError(f"Video file '{video_path}' not found.")
+    if os.path.exists(output_path):
+        raise FileExistsError(f"Output file '{output_path}' already exists.")
+
+    # Get variables from the video
+    total_frames = VideoIndex.load(video_path).frame_count
+    if total_frames == 0:
+        raise ValueError(f"No frames found in video '{video_path}'.")
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    size = (
+        int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+        int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+    )
+    cap.release()
+
+    # Split the frames into chunks, written next to the output
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    os.makedirs(output_dir, exist_ok=True)
+    temp_dir = tempfile.mkdtemp(prefix=".export_", dir=output_dir)
+    tasks = [
+        (
+            start,
+            min(start + chunk_size, total_frames),
+            os.path.join(temp_dir, f"chunk_{i:05d}.mp4"),
+        )
+        for i, start in enumerate(range(0, total_frames, chunk_size))
+    ]
+
+    start_time = time.perf_counter()
+    try:
+        # Decode, draw and encode the chunks in parallel
+        written = 0
+        with multiprocessing.Pool(
+            processes=workers or os.cpu_count(),
+            initializer=_init_worker,
+            initargs=(video_path, df_bbox, df_sequence, video_name, fps, size),
+        ) as pool:
+            progress = tqdm(total=total_frames, desc="Exporting", unit="frames")
+            for chunk_written in pool.imap(_export_chunk, tasks):
+                written += chunk_written
+                progress.update(chunk_written)
+            progress.close()
+
+        # Join the chunks into the output video
+        concat_chunks([task[2] for task in tasks], output_path, fps, size)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+    # Report the throughput
+    elapsed = time.perf_counter() - start_time
+    export_fps = written / elapsed if elapsed > 0 else 0.0
+    print(
+        f"Exported {written} frames to '{output_path}' in {elapsed:.1f} s "
+        f"({export_fps:.1f} fps, {export_fps / fps if fps else 0:.1f}x real time)"
+    )
+
+    return export_fps
@@ -0,0 +1,62 @@
+import collections
+import threading
+import numpy as np
+
+
+class FrameCache:
+    """Least-recently-used cache of decoded frames, bounded by a byte budget.
+
+    Frames are keyed by their zero-based index. Once the stored frames exceed the
+    budget, the least recently used ones are evicted. Safe to share between a
+    reading and a prefetching thread.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024**2):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._frames = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    def __contains__(self, index: int) -> bool:
+        with self._lock:
+            return index in self._frames
+
+    def get(self, index: int) -> np.ndarray:
+        """Get the frame at the index and mark it as recently used, or None if not cached."""
+
+        with self._lock:
+            frame = self._frames.get(index)
+            if frame is None:
+                return None
+            self._frames.move_to_end(index)
+
+        return frame
+
+    def put(self, index: int, frame: np.ndarray) -> None:
+        """Store the frame at the index, evicting the least recently used frames if over budget."""
+
+        # Skip frames larger than the whole budget
+        if frame.nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+
+            # Replace an existing frame
+            if index in self._frames:
+                self.nbytes -= self._frames.pop(index).nbytes
+            self._frames[index] = frame
+            self.nbytes += frame.nbytes
+
+            # Evict until within budget
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        """Remove all frames."""
+        with self._lock:
+            self._frames.clear()
+            self.nbytes = 0
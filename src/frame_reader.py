@@ -0,0 +1,248 @@
+import collections
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+
+sys.path.append(".")
+from src.frame_cache import FrameCache
+from src.video_index import VideoIndex
+
+
+def resize_to_display(frame, display_size: tuple):
+    """Downsize the frame to the display size.
+
+    Halves with area averaging while the frame is at least twice the display size,
+    which OpenCV does on a fast path and avoids aliasing, then scales the rest linearly.
+
+    Args:
+        frame (np.ndarray): Decoded frame.
+        display_size (tuple): Width and height to display at.
+
+    Returns:
+        np.ndarray: The resized frame, or the frame itself if already at the display size.
+    """
+
+    width, height = display_size
+    while frame.shape[1] >= 2 * width and frame.shape[0] >= 2 * height:
+        frame = cv2.resize(
+            frame, (frame.shape[1] // 2, frame.shape[0] // 2), interpolation=cv2.INTER_AREA
+        )
+    if (frame.shape[1], frame.shape[0]) != (width, height):
+        frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_LINEAR)
+
+    return frame
+
+
+class FramePrefetcher:
+    """Decode frames ahead on a background thread into a bounded ring buffer.
+
+    The producer thread decodes sequentially from its current position until the
+    buffer is full. Reading the next frames pops from the buffer; reading a frame
+    behind or far ahead of the buffer flushes it and restarts decoding there.
+
+    Frames handed out are kept in an LRU cache of raw decoded frames, so redraws
+    of the same frame and short scrubs back and forth skip seeking and decoding.
+
+    With a display size, the producer downsizes each frame right after decoding,
+    so the buffer, the cache and the drawing all work at display resolution.
+
+    Frames about to be needed after a jump can be warmed into the cache by a
+    second thread with its own capture. Reading a warmed frame outside the
+    buffer restarts the producer after the warmed frames, so the jump plays
+    from the cache while the producer seeks in the background.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        buffer_size: int = 32,
+        cache_bytes: int = 512 * 1024**2,
+        display_size: tuple = None,
+    ):
+        # Open the video, only the producer thread reads from it
+        self.video_path = video_path
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video '{video_path}'.")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS)
+
+        # Exact frame count and keyframes for seeking
+        self.video_index = VideoIndex.load(video_path)
+        self.total_frames = self.video_index.frame_count
+        self.buffer_size = buffer_size
+        self.cache = FrameCache(cache_bytes)
+        self.display_size = display_size
+
+        # Shared state, guarded by the condition
+        self._condition = threading.Condition()
+        self._buffer = collections.deque()
+        self._next_index = 0  # Index of the next frame the producer decodes
+        self._seek_index = None  # Pending seek for the producer
+        self._generation = 0  # Bumped on every flush to discard stale frames
+        self._eof = False
+        self._stopped = False
+
+        # Start the producer
+        self._thread = threading.Thread(target=self._produce, daemon=True)
+        self._thread.start()
+
+        # Warming thread and its capture, opened on the first warm
+        self._warmer = None
+        self._warm_cap = None
+
+    def _produce(self):
+        """Decode frames into the buffer until stopped."""
+
+        while True:
+            with self._condition:
+
+                # Wait for space in the buffer or a seek
+                while not self._stopped and self._seek_index is None and (
+                    self._eof or len(self._buffer) >= self.buffer_size
+                ):
+                    self._condition.wait()
+                if self._stopped:
+                    return
+
+                # Take the pending seek
+                seek_index, self._seek_index = self._seek_index, None
+                generation, index = self._generation, self._next_index
+
+            # Decode outside the lock
+            if seek_index is not None:
+                self.video_index.seek(self.cap, seek_index)
+            ret, frame = self.cap.read()
+            if ret and self.display_size is not None:
+                frame = resize_to_display(frame, self.display_size)
+
+            with self._condition:
+
+                # Discard frames decoded before a flush
+                if generation != self._generation:
+                    continue
+
+                if not ret:
+                    self._eof = True
+                else:
+                    self._buffer.append((index, frame))
+                    self._next_index = index + 1
+                self._condition.notify_all()
+
+    def _flush(self, index: int):
+        """Drop the buffer and restart decoding at the index. Caller holds the lock."""
+
+        self._generation += 1
+        self._buffer.clear()
+        self._seek_index = index
+        self._next_index = index
+        self._eof = False
+        self._condition.notify_all()
+
+    def read(self, index: int):
+        """Read the frame at the index, or None past the end of the video.
+
+        Args:
+            index (int): Zero-based frame index.
+
+        Returns:
+            np.ndarray: A copy of the decoded frame, free to draw on.
+        """
+
+        # Serve redraws, scrubs and warmed frames from the cache
+        frame = self.cache.get(index)
+        if frame is None:
+            frame = self._read_decoded(index)
+            if frame is None:
+                return None
+            self.cache.put(index, frame)
+        else:
+            self._follow(index)
+
+        return frame.copy()
+
+    def _follow(self, index: int):
+        """Restart the producer after the cached frames following the index, if outside the buffer."""
+
+        # First frame after the index that is not cached, no need to restart a buffer ahead
+        next_index, last = index + 1, min(index + 1 + self.buffer_size, self.total_frames)
+        while next_index < last and next_index in self.cache:
+            next_index += 1
+        if next_index >= last:
+            return
+
+        with self._condition:
+            front = self._buffer[0][0] if self._buffer else self._next_index
+            if front <= next_index <= self._next_index + self.buffer_size:
+                return
+            self._flush(next_index)
+
+    def warm(self, start: int, count: int):
+        """Decode frames into the cache on a background thread, without disturbing the producer.
+
+        Args:
+            start (int): Zero-based index of the first frame.
+            count (int): Number of frames to decode.
+        """
+
+        if start in self.cache:
+            return
+        if self._warmer is None:
+            self._warmer = ThreadPoolExecutor(max_workers=1)
+        self._warmer.submit(self._warm, start, count)
+
+    def _warm(self, start: int, count: int):
+        """Seek the warming capture to the start and cache the decoded frames."""
+
+        if self._warm_cap is None:
+            self._warm_cap = cv2.VideoCapture(self.video_path)
+        self.video_index.seek(self._warm_cap, start)
+
+        for index in range(start, min(start + count, self.total_frames)):
+            if self._stopped:
+                return
+            ret, frame = self._warm_cap.read()
+            if not ret:
+                return
+            if self.display_size is not None:
+                frame = resize_to_display(frame, self.display_size)
+            self.cache.put(index, frame)
+
+    def _read_decoded(self, index: int):
+        """Read the frame at the index from the decode buffer."""
+
+        with self._condition:
+
+            # Restart decoding if the frame is behind or far ahead of the buffer
+            front = self._buffer[0][0] if self._buffer else self._next_index
+            if index < front or index > self._next_index + self.buffer_size:
+                self._flush(index)
+
+            while True:
+
+                # Drop frames before the requested one
+                while self._buffer and self._buffer[0][0] < index:
+                    self._buffer.popleft()
+                    self._condition.notify_all()
+
+                if self._buffer:
+                    self._condition.notify_all()
+                    return self._buffer.popleft()[1]
+                if self._eof:
+                    return None
+                self._condition.wait()
+
+    def release(self):
+        """Stop the producer and the warming thread, and release the video."""
+
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        self._thread.join()
+        self.cap.release()
+
+        if self._warmer is not None:
+            self._warmer.shutdown(wait=True, cancel_futures=True)
+        if self._warm_cap is not None:
+            self._warm_cap.release()
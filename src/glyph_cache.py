@@ -0,0 +1,116 @@
+import collections
+import cv2
+import numpy as np
+
+
+class GlyphCache:
+    """Cache of pre-rasterized text sprites, blended into frames with NumPy slicing.
+
+    Each (text, color, scale, thickness, line type) is rendered once with
+    'cv2.putText' into a small alpha mask, stored as the premultiplied text
+    color and the inverse alpha. Drawing it again only blends the sprite into
+    the frame region it covers, so repeated labels skip the text rasterization.
+    The least recently drawn sprites are evicted when full, so the labels in view
+    stay cached. Text that changes every frame is drawn directly, see 'put_text'.
+    """
+
+    def __init__(self, font: int = cv2.FONT_HERSHEY_DUPLEX, max_sprites: int = 4096):
+        self.font = font
+        self.max_sprites = max_sprites
+        self._sprites = collections.OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sprites)
+
+    def _render(self, text: str, color: tuple, scale: float, thickness: int, line_type: int) -> tuple:
+        """Rasterize the text into a sprite with its offset from the text origin."""
+
+        (width, height), baseline = cv2.getTextSize(text, self.font, scale, thickness)
+
+        # Pad by the thickness, strokes reach outside the text box
+        pad = thickness + 1
+        alpha = np.zeros((height + baseline + 2 * pad, width + 2 * pad, 3), dtype=np.uint8)
+        cv2.putText(alpha, text, (pad, pad + height), self.font, scale, (255, 255, 255), thickness, line_type)
+
+        # Premultiply the color, the frame is weighted by the inverse alpha when drawn
+        foreground = cv2.multiply(
+            np.full_like(alpha, np.asarray(color, dtype=np.uint8)), alpha, scale=1 / 255
+        )
+        background = 255 - alpha
+
+        return foreground, background, (-pad, -pad - height)
+
+    def get(
+        self, text: str, color: tuple, scale: float, thickness: int = 1, line_type: int = cv2.LINE_8
+    ) -> tuple:
+        """Get the sprite of the text, rendering it on the first use.
+
+        Returns:
+            tuple: The premultiplied color, the inverse alpha, and the offset of the sprite corner from the text origin.
+        """
+
+        key = (text, tuple(color), scale, thickness, line_type)
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            return sprite
+
+        # Evict the least recently drawn sprites when full
+        while len(self._sprites) >= self.max_sprites:
+            self._sprites.popitem(last=False)
+        sprite = self._sprites[key] = self._render(text, color, scale, thickness, line_type)
+
+        return sprite
+
+    def put_text(
+        self,
+        frame: np.ndarray,
+        text: str,
+        origin: tuple,
+        scale: float,
+        color: tuple,
+        thickness: int = 1,
+        line_type: int = cv2.LINE_8,
+        cache: bool = True,
+    ) -> np.ndarray:
+        """Draw the text on the frame like 'cv2.putText', with the bottom-left corner at the origin.
+
+        Args:
+            frame (np.ndarray): BGR frame to draw on, modified in place.
+            text (str):         Text to draw.
+            origin (tuple):     Bottom-left corner of the text in pixels.
+            scale (float):      Font scale.
+            color (tuple):      BGR color.
+            thickness (int):    Stroke thickness.
+            line_type (int):    Line type passed to 'cv2.putText'.
+            cache (bool):       Draw through the cache. Text that changes every frame,
+                                eg. a frame number, is drawn directly to keep the
+                                cached labels from being evicted.
+
+        Returns:
+            np.ndarray: The frame.
+        """
+
+        if not cache:
+            return cv2.putText(frame, text, origin, self.font, scale, color, thickness, line_type)
+
+        foreground, background, (dx, dy) = self.get(text, color, scale, thickness, line_type)
+
+        # Clip the sprite to the frame
+        x0, y0 = int(origin[0]) + dx, int(origin[1]) + dy
+        x1, y1 = x0 + foreground.shape[1], y0 + foreground.shape[0]
+        fx0, fy0 = max(x0, 0), max(y0, 0)
+        fx1, fy1 = min(x1, frame.shape[1]), min(y1, frame.shape[0])
+        if fx0 >= fx1 or fy0 >= fy1:
+            return frame
+        sprite = np.s_[fy0 - y0 : fy1 - y0, fx0 - x0 : fx1 - x0]
+        region = frame[fy0:fy1, fx0:fx1]
+
+        # Blend in place, region * (1 - alpha) + color * alpha
+        cv2.add(
+            cv2.multiply(region, background[sprite], scale=1 / 255),
+            foreground[sprite],
+            dst=region,
+        )
+
+        return frame
@@ -0,0 +1,181 @@
+import heapq
+import numpy as np
+import pandas as pd
+
+
+def encode_keys(dfs: list, columns: list) -> list:
+    """Encode the key columns of the DataFrames as shared integer codes, one per combination.
+
+    Text columns are compared as text and numeric columns as numbers, so eg. a
+    categorical video name or an int32 and a nullable pedestrian ID still match.
+
+    Args:
+        dfs (list):     DataFrames with the key columns.
+        columns (list): Key columns.
+
+    Returns:
+        list: Codes of each DataFrame (N,), -1 where a key is missing.
+    """
+
+    if len(columns) == 0:
+        return [np.zeros(len(df), dtype=np.int64) for df in dfs]
+
+    keys = pd.concat(
+        [
+            pd.DataFrame(
+                {
+                    column: (
+                        df[column].to_numpy(dtype=np.float64, na_value=np.nan)
+                        if pd.api.types.is_numeric_dtype(df[column])
+                        and not isinstance(df[column].dtype, pd.CategoricalDtype)
+                        else df[column].astype(str).to_numpy()
+                    )
+                    for column in columns
+                }
+            )
+            for df in dfs
+        ],
+        ignore_index=True,
+    )
+    codes = keys.groupby(columns, sort=False).ngroup().fillna(-1).to_numpy(dtype=np.int64)
+
+    # Split the codes back per DataFrame
+    bounds = np.cumsum([0] + [len(df) for df in dfs])
+    return [codes[start:end] for start, end in zip(bounds[:-1], bounds[1:])]
+
+
+def build_segments(interval_keys: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> tuple:
+    """Split keyed intervals into elementary segments and pick the first interval covering each.
+
+    Keys and frames are combined into one sorted axis, every start and every
+    frame after an end opening a new segment. Overlapping intervals resolve to
+    the first one in the given order. The segments are swept in order with a
+    heap of the active intervals, ordered by position, so the cost is
+    O(n log n) in the number of intervals, however deep they overlap.
+
+    Args:
+        interval_keys (np.ndarray): Key code of each interval (M,), negative if missing.
+        starts (np.ndarray):        Start frame of each interval (M,), NaN if missing.
+        ends (np.ndarray):          End frame of each interval, inclusive (M,), NaN if missing.
+
+    Returns:
+        tuple: Lowest frame, frames per key on the axis, sorted segment bounds
+            and the winning interval position of each segment, -1 if uncovered.
+    """
+
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+
+    # Skip intervals without a key or a complete interval
+    valid = (interval_keys >= 0) & ~np.isnan(starts) & ~np.isnan(ends) & (ends >= starts)
+    positions = np.flatnonzero(valid)
+    if len(positions) == 0:
+        return 0, 0, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+    # One axis of key and frame, frames shifted to start at zero
+    low = int(starts[valid].min())
+    span = int(ends[valid].max()) - low + 2
+    lows = interval_keys[valid] * span + (starts[valid] - low).astype(np.int64)
+    highs = interval_keys[valid] * span + (ends[valid] - low).astype(np.int64) + 1
+
+    # Elementary segments, and the first and past-the-last segment of each interval
+    bounds = np.unique(np.concatenate([lows, highs]))
+    order = np.argsort(lows, kind="stable")
+    firsts = np.searchsorted(bounds, lows[order]).tolist()
+    lasts = np.searchsorted(bounds, highs[order]).tolist()
+    ordered_positions = positions[order].tolist()
+
+    # Sweep the segments, the active interval first in order wins each
+    winners = [-1] * len(bounds)
+    active, i = [], 0
+    for segment in range(len(bounds)):
+        while i < len(firsts) and firsts[i] == segment:
+            heapq.heappush(active, (ordered_positions[i], lasts[i]))
+            i += 1
+        while active and active[0][1] <= segment:
+            heapq.heappop(active)
+        if active:
+            winners[segment] = active[0][0]
+
+    return low, span, bounds, np.array(winners, dtype=np.int64)
+
+
+def lookup_segments(segments: tuple, point_keys: np.ndarray, frames: np.ndarray) -> np.ndarray:
+    """Find the winning interval of each point with one binary search, see 'build_segments'.
+
+    Args:
+        segments (tuple):           Segments from 'build_segments'.
+        point_keys (np.ndarray):    Key code of each point (N,), negative if missing.
+        frames (np.ndarray):        Frame of each point (N,), NaN if missing.
+
+    Returns:
+        np.ndarray: Position of the covering interval of each point (N,), -1 if none.
+    """
+
+    low, span, bounds, winners = segments
+    point_keys = np.asarray(point_keys, dtype=np.int64)
+    frames = np.asarray(frames, dtype=np.float64) - low
+    rows = np.full(len(frames), -1, dtype=np.int64)
+    if len(bounds) == 0:
+        return rows
+
+    # Points outside the frames of every interval stay uncovered
+    points = (point_keys >= 0) & (frames >= 0) & (frames < span)
+    point_axis = point_keys[points] * span + frames[points].astype(np.int64)
+    segment = np.searchsorted(bounds, point_axis, side="right") - 1
+    rows[points] = np.where(segment >= 0, winners[np.maximum(segment, 0)], -1)
+
+    return rows
+
+
+def interval_join(
+    point_keys: np.ndarray,
+    frames: np.ndarray,
+    interval_keys: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+) -> np.ndarray:
+    """Find the interval of the same key covering each point, eg. the sequence of each bounding box.
+
+    The intervals are split into segments with 'build_segments', and each point
+    is found with one binary search, so the cost grows with the number of
+    points and intervals, not with the length of the intervals.
+
+    Args:
+        point_keys (np.ndarray):    Key code of each point (N,), negative if missing.
+        frames (np.ndarray):        Frame of each point (N,), NaN if missing.
+        interval_keys (np.ndarray): Key code of each interval (M,), negative if missing.
+        starts (np.ndarray):        Start frame of each interval (M,), NaN if missing.
+        ends (np.ndarray):          End frame of each interval, inclusive (M,), NaN if missing.
+
+    Returns:
+        np.ndarray: Position of the covering interval of each point (N,), -1 if none.
+    """
+
+    return lookup_segments(build_segments(interval_keys, starts, ends), point_keys, frames)
+
+
+def join_sequences(
+    df_bbox: pd.DataFrame, df_sequence: pd.DataFrame, keys: list = ["video_name", "pedestrian_id"]
+) -> np.ndarray:
+    """Find the sequence row of each bounding box, the first in the file if sequences overlap.
+
+    Args:
+        df_bbox (pd.DataFrame):     Bounding boxes with the keys and 'frame_id'.
+        df_sequence (pd.DataFrame): Sequences with the keys, 'start_frame' and 'end_frame'.
+        keys (list):                Columns a box and its sequence share, missing ones are skipped.
+
+    Returns:
+        np.ndarray: Row position in the sequences of each box (N,), -1 if none.
+    """
+
+    keys = [key for key in keys if key in df_bbox.columns and key in df_sequence.columns]
+    bbox_keys, sequence_keys = encode_keys([df_bbox, df_sequence], keys)
+
+    return interval_join(
+        bbox_keys,
+        df_bbox["frame_id"].to_numpy(dtype=np.float64, na_value=np.nan),
+        sequence_keys,
+        df_sequence["start_frame"].to_numpy(dtype=np.float64, na_value=np.nan),
+        df_sequence["end_frame"].to_numpy(dtype=np.float64, na_value=np.nan),
+    )
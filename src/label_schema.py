@@ -0,0 +1,130 @@
+import warnings
+import pandas as pd
+
+# Column types of the label tables. Text as categoricals, ids and frames as
+# 32-bit integers and normalized coordinates as 32-bit floats. 'Int32' columns
+# may be empty, eg. a sequence without a gesture label.
+BBOX_SCHEMA = {
+    "video_name": "category",
+    "camera": "category",
+    "frame_id": "int32",
+    "pedestrian_id": "int32",
+    "x1": "float32",
+    "y1": "float32",
+    "x2": "float32",
+    "y2": "float32",
+}
+SEQUENCE_SCHEMA = {
+    "video_name": "category",
+    "camera": "category",
+    "pedestrian_id": "int32",
+    "start_frame": "int32",
+    "end_frame": "int32",
+    "gesture_label_id": "Int32",
+}
+STRETCHED_SCHEMA = {**BBOX_SCHEMA, "gesture_label_id": "Int32"}
+
+# Any label table, the columns do not conflict
+LABEL_SCHEMA = {**BBOX_SCHEMA, **SEQUENCE_SCHEMA}
+
+
+def get_nullable_dtypes(schema: dict) -> dict:
+    """Get the schema with nullable integers, for columns with missing values."""
+
+    return {
+        column: "Int32" if dtype == "int32" else dtype for column, dtype in schema.items()
+    }
+
+
+def apply_schema(df: pd.DataFrame, schema: dict = LABEL_SCHEMA) -> pd.DataFrame:
+    """Convert the columns of the DataFrame to the types of the schema, in place.
+
+    Integer columns with missing values stay nullable. Columns that do not fit
+    their type, eg. text in an id column, keep their type.
+
+    Args:
+        df (pd.DataFrame):  Labels to convert.
+        schema (dict):      Column types, columns not in the DataFrame are skipped.
+
+    Returns:
+        pd.DataFrame: The converted DataFrame.
+    """
+
+    if df is None:
+        return None
+
+    for column, dtype in schema.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        if dtype == "int32" and values.hasnans:
+            dtype = "Int32"
+        if values.dtype == dtype:
+            continue
+        try:
+            df[column] = values.astype(dtype)
+        except (TypeError, ValueError):
+            continue
+
+    return df
+
+
+def read_csv_typed(csv_file, schema: dict = LABEL_SCHEMA, **kwargs) -> pd.DataFrame:
+    """Read a label CSV file with the column types of the schema.
+
+    Args:
+        csv_file (str | file):  Path or buffer of the CSV file.
+        schema (dict):          Column types, columns not in the file are skipped.
+        **kwargs:               Passed on to 'pd.read_csv'.
+
+    Returns:
+        pd.DataFrame: The labels.
+    """
+
+    # Parse straight into the schema types, nullable integers are slower to parse
+    for dtypes in [schema, get_nullable_dtypes(schema), None]:
+        if hasattr(csv_file, "seek"):
+            csv_file.seek(0)
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore", RuntimeWarning)  # Casting missing values
+                df = pd.read_csv(csv_file, index_col=False, dtype=dtypes, **kwargs)
+            break
+        except (TypeError, ValueError):
+            # Eg. missing values or text in an id column
+            if dtypes is None:
+                raise
+
+    return apply_schema(df, schema)
+
+
+def concat_labels(dfs: list, schema: dict = LABEL_SCHEMA) -> pd.DataFrame:
+    """Concatenate label DataFrames, keeping the text columns categorical.
+
+    Args:
+        dfs (list):     DataFrames to concatenate.
+        schema (dict):  Column types of the result.
+
+    Returns:
+        pd.DataFrame: The concatenated labels.
+    """
+
+    # Share the categories, otherwise pandas falls back to text. Categories read
+    # from a store or an empty file may be objects instead of strings.
+    dfs = [df.copy(deep=False) for df in dfs]
+    for column, dtype in schema.items():
+        if dtype != "category":
+            continue
+        values = [df[column] for df in dfs if column in df.columns]
+        if len(values) == 0 or not all(
+            isinstance(v.dtype, pd.CategoricalDtype) for v in values
+        ):
+            continue
+        categories = pd.Index(
+            sorted(set().union(*(v.cat.categories for v in values))), dtype=str
+        )
+        for df in dfs:
+            if column in df.columns:
+                df[column] = df[column].cat.set_categories(categories)
+
+    return apply_schema(pd.concat(dfs, ignore_index=True), schema)
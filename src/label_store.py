@@ -0,0 +1,275 @@
+import os
+import csv
+import glob
+import time
+import atexit
+import numpy as np
+import pandas as pd
+from src.label_schema import LABEL_SCHEMA, apply_schema, read_csv_typed, concat_labels
+
+
+def get_store_path(csv_path: str) -> str:
+    """Get the path of the columnar store next to a label CSV file, eg. 'bbox.csv' to 'bbox.npz'."""
+
+    return os.path.splitext(csv_path)[0] + ".npz"
+
+
+def write_store(df: pd.DataFrame, store_path: str) -> None:
+    """Write the labels to a columnar NumPy store.
+
+    Text columns are stored as categorical codes and their categories, integer
+    columns as int32 when they fit, and float columns as float32. No pickled
+    objects are stored, so loading never runs code from the file.
+
+    Args:
+        df (pd.DataFrame):  Labels to store.
+        store_path (str):   Path to the '.npz' file.
+    """
+
+    arrays = {"__columns__": np.array(df.columns, dtype=str)}
+    for column in df.columns:
+        values = df[column]
+
+        # Text as codes into the sorted unique values, -1 for missing
+        if not pd.api.types.is_numeric_dtype(values) or isinstance(
+            values.dtype, pd.CategoricalDtype
+        ):
+            categorical = pd.Categorical(values.astype("string").astype(object))
+            arrays[f"{column}.codes"] = categorical.codes.astype(np.int32)
+            arrays[f"{column}.categories"] = np.array(categorical.categories, dtype=str)
+            continue
+
+        # Missing values in integer columns are stored as floats, like pandas reads them
+        if isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+            values = (
+                values.to_numpy(dtype=np.float64, na_value=np.nan)
+                if values.hasnans
+                else values.to_numpy(dtype=values.dtype.numpy_dtype)
+            )
+        else:
+            values = values.to_numpy()
+        if np.issubdtype(values.dtype, np.integer):
+            info = np.iinfo(np.int32)
+            if len(values) == 0 or (values.min() >= info.min and values.max() <= info.max):
+                values = values.astype(np.int32)
+        elif np.issubdtype(values.dtype, np.floating):
+            values = values.astype(np.float32)
+        arrays[column] = values
+
+    # Write to a temporary file, so readers never see a partial store
+    temp_path = store_path + ".part"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, store_path)
+
+
+def read_store(store_path: str) -> pd.DataFrame:
+    """Read the labels from a columnar NumPy store, with the text columns as categoricals."""
+
+    with np.load(store_path, allow_pickle=False) as store:
+        data = {}
+        for column in store["__columns__"].tolist():
+            if f"{column}.codes" in store:
+                data[column] = pd.Categorical.from_codes(
+                    store[f"{column}.codes"],
+                    categories=store[f"{column}.categories"].astype(object),
+                )
+            else:
+                data[column] = store[column]
+
+    return pd.DataFrame(data)
+
+
+def convert_csv(csv_path: str, store_path: str = None) -> str:
+    """Convert a label CSV file to a columnar store.
+
+    Args:
+        csv_path (str):     Path to the CSV file.
+        store_path (str):   Path to the '.npz' file. Defaults to next to the CSV file.
+
+    Returns:
+        str: Path to the store.
+    """
+
+    store_path = store_path or get_store_path(csv_path)
+    write_store(read_csv_typed(csv_path), store_path)
+
+    return store_path
+
+
+def has_store(csv_path: str) -> bool:
+    """Check if the CSV file has a store that is at least as new as the CSV file."""
+
+    store_path = get_store_path(csv_path)
+    if not os.path.exists(store_path):
+        return False
+    if not os.path.exists(csv_path):
+        return True
+
+    return os.path.getmtime(store_path) >= os.path.getmtime(csv_path)
+
+
+def read_labels(csv_path: str, schema: dict = LABEL_SCHEMA) -> pd.DataFrame:
+    """Read a label CSV file, from its columnar store instead if it is up to date.
+
+    Args:
+        csv_path (str): Path to the CSV file. The store may exist without the CSV file.
+        schema (dict):  Column types of the labels, see 'src.label_schema'.
+
+    Returns:
+        pd.DataFrame: The labels.
+    """
+
+    if has_store(csv_path):
+        return apply_schema(read_store(get_store_path(csv_path)), schema)
+
+    return read_csv_typed(csv_path, schema)
+
+
+def get_part_paths(csv_path: str) -> list:
+    """Get the batches written by a columnar 'LabelWriter' and not merged into the store yet, in order.
+
+    They are kept in a hidden '.index' folder next to the CSV file, eg. '.index/bbox.part0.npz'.
+    """
+
+    stem = os.path.splitext(os.path.basename(csv_path))[0]
+    pattern = os.path.join(os.path.dirname(csv_path), ".index", f"{glob.escape(stem)}.part*.npz")
+    part_paths = [
+        path
+        for path in glob.glob(pattern)
+        if os.path.basename(path)[len(stem) + 5 : -4].isdigit()
+    ]
+
+    return sorted(part_paths, key=lambda path: int(os.path.basename(path)[len(stem) + 5 : -4]))
+
+
+def merge_parts(csv_path: str, schema: dict = LABEL_SCHEMA) -> bool:
+    """Merge the batches of a columnar 'LabelWriter' into the store, after the existing labels.
+
+    Also recovers the batches of an interrupted run, which are on disk before it closed.
+
+    Args:
+        csv_path (str): Path to the CSV file of the store.
+        schema (dict):  Column types of the labels.
+
+    Returns:
+        bool: True if there were batches to merge.
+    """
+
+    part_paths = get_part_paths(csv_path)
+    if len(part_paths) == 0:
+        return False
+
+    dfs = []
+    if has_store(csv_path) or (os.path.exists(csv_path) and os.path.getsize(csv_path) > 0):
+        dfs.append(read_labels(csv_path, schema))
+    dfs.extend(apply_schema(read_store(path), schema) for path in part_paths)
+    write_store(concat_labels(dfs, schema), get_store_path(csv_path))
+    for path in part_paths:
+        os.remove(path)
+
+    return True
+
+
+class LabelWriter:
+    """Buffered writer of label rows, appending them to a CSV file or a columnar store in batches.
+
+    Rows are flushed once 'max_rows' are buffered or 'max_seconds' passed since
+    the last flush, and on close, also when the program exits or is interrupted.
+    The CSV file gets its header if it is new or empty.
+
+    With 'columnar', the rows go to the store of the CSV file instead, see
+    'get_store_path'. A store cannot be appended to, so each flush writes its
+    rows as a numbered batch, see 'get_part_paths', and on close the batches are
+    merged into the store once. Batches of a crashed run stay on disk and are
+    merged by the next writer or 'merge_parts'.
+
+    Example:
+        with LabelWriter(csv_path, ["video_name", "frame_id", "x1"]) as writer:
+            writer.write_rows([("video_0", 0, 0.5), ("video_0", 1, 0.6)])
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        columns: list,
+        max_rows: int = 10_000,
+        max_seconds: float = 5.0,
+        columnar: bool = False,
+        schema: dict = LABEL_SCHEMA,
+    ):
+        self.csv_path = csv_path
+        self.columns = list(columns)
+        self.max_rows = max_rows
+        self.max_seconds = max_seconds
+        self.columnar = columnar
+        self.schema = schema
+        self.rows = []
+        self.last_flush = time.monotonic()
+        self.closed = False
+
+        # Number the batches after those of an interrupted run
+        part_paths = get_part_paths(csv_path) if columnar else []
+        self.next_part = (
+            int(os.path.basename(part_paths[-1]).split(".part")[-1][:-4]) + 1 if part_paths else 0
+        )
+
+        atexit.register(self.close)
+
+    def write(self, row: tuple) -> None:
+        """Buffer a row, with a value per column."""
+
+        self.write_rows([row])
+
+    def write_rows(self, rows: list) -> None:
+        """Buffer rows, eg. the detections of a frame, and flush if a threshold is reached."""
+
+        if self.closed:
+            raise ValueError(f"Label writer of {self.csv_path} is closed.")
+
+        self.rows.extend(rows)
+        if (
+            len(self.rows) >= self.max_rows
+            or time.monotonic() - self.last_flush >= self.max_seconds
+        ):
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered rows, to the CSV file or as a batch of the store."""
+
+        self.last_flush = time.monotonic()
+        if len(self.rows) == 0:
+            return
+
+        if self.columnar:
+            index_folder = os.path.join(os.path.dirname(self.csv_path), ".index")
+            os.makedirs(index_folder, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(self.csv_path))[0]
+            df = apply_schema(pd.DataFrame(self.rows, columns=self.columns), self.schema)
+            write_store(df, os.path.join(index_folder, f"{stem}.part{self.next_part}.npz"))
+            self.next_part += 1
+        else:
+            write_header = not os.path.exists(self.csv_path) or os.path.getsize(self.csv_path) == 0
+            with open(self.csv_path, "a", newline="") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                if write_header:
+                    writer.writerow(self.columns)
+                writer.writerows(self.rows)
+        self.rows = []
+
+    def close(self) -> None:
+        """Flush the remaining rows, and merge the batches into the store if columnar."""
+
+        if self.closed:
+            return
+        self.flush()
+        if self.columnar:
+            merge_parts(self.csv_path, self.schema)
+        self.closed = True
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "LabelWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
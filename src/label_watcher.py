@@ -0,0 +1,237 @@
+import io
+import os
+import time
+import hashlib
+import pandas as pd
+from src.label_store import has_store, get_store_path, read_labels
+from src.label_schema import LABEL_SCHEMA, read_csv_typed, concat_labels
+
+
+class LabelWatcher:
+    """Watch a label CSV file and rebuild its index when the file changes on disk.
+
+    The file is compared block by block with the digests of the previous
+    version, so only the digests and line counts of the blocks are kept, not the
+    file itself. Rows before the first changed block are kept, and only the bytes
+    from its first line onward are parsed again, so appending rows or editing
+    near the end of a large file is cheap. The index is rebuilt only if the rows
+    of the watched video changed, and only from them.
+
+    While the CSV file has an up to date columnar store, eg. converted or
+    written by the extraction, the store is loaded and watched instead. Stores
+    are rewritten whole, so a changed store is read again whole.
+    """
+
+    def __init__(
+        self,
+        csv_path: str,
+        index_class: type,
+        row_filter=None,
+        interval: float = 0.5,
+        block_size: int = 256 * 1024,
+        schema: dict = LABEL_SCHEMA,
+    ):
+        """
+        Args:
+            csv_path (str):     Path to the CSV file to watch.
+            index_class (type): Index built from the filtered rows, eg. 'BboxIndex' or 'SequenceIndex'.
+            row_filter (callable): Function selecting the rows of the watched video from a DataFrame, or None to keep all rows.
+            interval (float):   Minimum seconds between checks of the file.
+            block_size (int):   Size in bytes of the blocks compared between versions.
+            schema (dict):      Column types of the labels, see 'src.label_schema'.
+        """
+
+        self.csv_path = csv_path
+        self.index_class = index_class
+        self.row_filter = row_filter
+        self.interval = interval
+        self.block_size = block_size
+        self.schema = schema
+
+        self._last_check = time.monotonic()
+        self._load()
+
+    def _source(self) -> tuple:
+        """Get the path, modification time and size of the file the labels are read from."""
+
+        source_path = get_store_path(self.csv_path) if has_store(self.csv_path) else self.csv_path
+        stat = os.stat(source_path)
+
+        return source_path, stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> bytes:
+        """Read the CSV file and remember its modification time and size."""
+
+        stat = os.stat(self.csv_path)
+        with open(self.csv_path, "rb") as f:
+            data = f.read()
+        self._stat = (self.csv_path, stat.st_mtime_ns, stat.st_size)
+
+        return data
+
+    def _read_store(self) -> pd.DataFrame:
+        """Read the labels from the store, without digests to compare the CSV file with."""
+
+        stat = self._source()
+        df = read_labels(self.csv_path, self.schema)
+        self._stat = stat
+        self._digests, self._block_lines = [], []
+        self._rows_are_lines = False
+
+        return df
+
+    def _filter(self, df: pd.DataFrame) -> pd.DataFrame:
+        if self.row_filter is None:
+            return df
+        return self.row_filter(df)
+
+    def _digest_blocks(self, data: bytes) -> list:
+        """Get the digest of each block of the file."""
+
+        return [
+            hashlib.blake2b(data[start : start + self.block_size], digest_size=16).digest()
+            for start in range(0, len(data), self.block_size)
+        ]
+
+    def _commit(self, data: bytes, df: pd.DataFrame, line_breaks: int = None) -> None:
+        """Store the parsed version of the file, and the digests and line breaks of its blocks."""
+
+        self.df = df
+        self._digests = self._digest_blocks(data)
+        self._block_lines = [
+            data.count(b"\n", start, start + self.block_size)
+            for start in range(0, len(data), self.block_size)
+        ]
+
+        # Rows map to lines only without quoted line breaks or blank lines
+        if line_breaks is None:
+            line_breaks = data.count(b"\n")
+        lines = line_breaks + (0 if data.endswith(b"\n") else 1)
+        self._rows_are_lines = len(df) == lines - 1
+
+    def _load(self) -> None:
+        """Read the whole file or its store and build the index."""
+
+        if has_store(self.csv_path):
+            self.df = self._read_store()
+        else:
+            data = self._read()
+            self._commit(data, read_csv_typed(io.BytesIO(data), self.schema))
+        self.index = self.index_class(self._filter(self.df))
+
+    def _changed_offset(self, data: bytes) -> tuple:
+        """Get the byte offset of the first line that may have changed, or 0 to parse everything.
+
+        Returns:
+            tuple: The offset, and the number of rows of the previous version before it.
+        """
+
+        if not self._rows_are_lines:
+            return 0, 0
+
+        # Find the first block that differs from the previous version
+        digests = self._digest_blocks(data)
+        block = 0
+        while (
+            block < min(len(digests), len(self._digests))
+            and digests[block] == self._digests[block]
+        ):
+            block += 1
+
+        # Back up to the start of the line, never into the header
+        block_start = block * self.block_size
+        offset = data.rfind(b"\n", 0, block_start) + 1
+        header_end = data.find(b"\n") + 1
+        if header_end == 0 or offset <= header_end:
+            return 0, 0
+
+        # Lines before the offset are unchanged, one per kept row after the header
+        line_breaks = sum(self._block_lines[:block]) - data.count(b"\n", offset, block_start)
+
+        return offset, line_breaks - 1
+
+    def poll(self) -> bool:
+        """Check the file for changes and reload the changed rows.
+
+        Returns:
+            bool: True if the index was rebuilt, otherwise False.
+        """
+
+        # Limit how often the file is checked
+        now = time.monotonic()
+        if now - self._last_check < self.interval:
+            return False
+        self._last_check = now
+
+        # Skip unchanged and temporarily missing files, eg. while an editor saves
+        try:
+            source = self._source()
+        except FileNotFoundError:
+            return False
+        if source == self._stat:
+            return False
+
+        # Read a changed store whole
+        if source[0] != self.csv_path:
+            try:
+                self.df = self._read_store()
+            except (OSError, ValueError) as e:
+                print(
+                    f"Warning: Could not read the store of '{self.csv_path}', keeping the previous labels. {e}"
+                )
+                return False
+            return self._reindex(True)
+
+        try:
+            data = self._read()
+            offset, kept_rows = self._changed_offset(data)
+
+            # Parse everything again if the header or a quoted field is involved
+            if offset == 0:
+                df = read_csv_typed(io.BytesIO(data), self.schema)
+                kept, removed = df.iloc[:0], self.df
+                line_breaks = None
+            else:
+                line_breaks = kept_rows + 1 + data.count(b"\n", offset)
+                kept, removed = self.df.iloc[:kept_rows], self.df.iloc[kept_rows:]
+                tail = (
+                    read_csv_typed(
+                        io.BytesIO(data[offset:]),
+                        self.schema,
+                        header=None,
+                        names=list(self.df.columns),
+                    )
+                    if data[offset:].strip()
+                    else self.df.iloc[:0]  # Rows removed at the end
+                )
+                df = concat_labels([kept, tail], self.schema)
+        except (pd.errors.ParserError, pd.errors.EmptyDataError, UnicodeDecodeError) as e:
+            # Half-written file, try again on the next change
+            print(f"Warning: Could not parse '{self.csv_path}', keeping the previous labels. {e}")
+            return False
+
+        # Rebuild the index only if the rows of the video changed
+        changed = df.iloc[len(kept) :]
+        affected = (
+            offset == 0
+            or not self._filter(removed).empty
+            or not self._filter(changed).empty
+        )
+        self._commit(data, df, line_breaks)
+
+        return self._reindex(affected)
+
+    def _reindex(self, affected: bool) -> bool:
+        """Rebuild the index from the rows of the watched video, if they may have changed."""
+
+        if not affected:
+            return False
+        try:
+            index = self.index_class(self._filter(self.df))
+        except (KeyError, ValueError) as e:
+            # Eg. a column renamed while editing the header
+            print(f"Warning: Could not index '{self.csv_path}', keeping the previous labels. {e}")
+            return False
+        self.index = index
+
+        return True
@@ -0,0 +1,67 @@
+import math
+import time
+
+
+class PlaybackClock:
+    """Wall clock that paces playback at the source fps times a rate factor.
+
+    Frame indices are scheduled from the moment of the last reset, so time spent
+    decoding and drawing is taken into account. When playback falls behind, the
+    due index runs ahead of the next frame and the frames in between are skipped.
+    Also keeps smoothed per-stage timings and the number of dropped frames.
+    """
+
+    def __init__(self, fps: float, smoothing: float = 0.1):
+        self.fps = fps if fps and fps > 0 else 30.0
+        self.smoothing = smoothing
+        self.timings = {}
+        self.dropped = 0
+        self.reset(0)
+
+    def reset(self, index: int, rate: float = 1.0) -> None:
+        """Schedule the frame index to be due now, and the following frames at the rate.
+
+        Args:
+            index (int):    Frame index due now.
+            rate (float):   Playback speed factor, 1 for real time.
+        """
+
+        self.start_time = time.perf_counter()
+        self.start_index = index
+        self.rate = rate
+
+    def due_index(self) -> int:
+        """Get the frame index that should be on screen now."""
+
+        elapsed = time.perf_counter() - self.start_time
+        return self.start_index + math.floor(elapsed * self.fps * self.rate)
+
+    def delay_ms(self, index: int) -> int:
+        """Get the milliseconds until the frame index is due, at least 1 for 'cv2.waitKeyEx'."""
+
+        due_time = self.start_time + (index - self.start_index) / (self.fps * self.rate)
+        return max(1, int((due_time - time.perf_counter()) * 1000))
+
+    def skip_to_due(self, index: int) -> int:
+        """Get the frame index to show next, skipping ahead to the due index when behind.
+
+        Args:
+            index (int): Next frame index in order.
+
+        Returns:
+            int: The due index if behind, otherwise the given index. Skipped frames are counted as dropped.
+        """
+
+        due = self.due_index()
+        if due <= index:
+            return index
+
+        self.dropped += due - index
+        return due
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Record the duration of a stage in milliseconds, smoothed over the recent frames."""
+
+        ms = seconds * 1000
+        previous = self.timings.get(stage, ms)
+        self.timings[stage] = previous + self.smoothing * (ms - previous)
@@ -0,0 +1,214 @@
+import os
+import sys
+import glob
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+sys.path.append(".")
+from src.visualize_video_bbox import (
+    filter_df,
+    look_for_csv_path,
+    open_reader,
+    visualize_video,
+)
+from src.label_store import read_labels, has_store, get_store_path
+from src.catalog import open_catalog
+
+
+def expand_video_paths(patterns: list) -> list:
+    """Expand the video paths and glob patterns into a list of video files, in the given order.
+
+    Args:
+        patterns (list): Video paths or glob patterns, eg. 'data/videos/*/front.mp4'.
+
+    Returns:
+        list: Video paths without duplicates. Patterns are sorted, matching folders are skipped.
+    """
+
+    video_paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for video_path in matches:
+            if video_path in video_paths or os.path.isdir(video_path):
+                continue
+            video_paths.append(video_path)
+
+    return video_paths
+
+
+def split_video_path(video_path: str, videos_folder_name: str = "videos") -> tuple:
+    """Split a video path in the dataset layout into the main folder and the video name.
+
+    Args:
+        video_path (str):           Path to the video, eg. 'project/videos/video_00/front.mp4'.
+        videos_folder_name (str):   Name of the videos folder.
+
+    Returns:
+        tuple: Main folder path and video name, eg. ('project', 'video_00/front'). None and the file name outside the layout.
+    """
+
+    parts = os.path.normpath(os.path.abspath(video_path)).split(os.sep)
+    name = os.path.splitext(parts[-1])[0]
+    if videos_folder_name not in parts[:-1]:
+        return None, name
+
+    # Split at the innermost videos folder
+    i = len(parts) - 2 - parts[-2::-1].index(videos_folder_name)
+    main_folder_path = os.sep.join(parts[:i]) or os.sep
+    video_name = "/".join(parts[i + 1 : -1] + [name])
+
+    return main_folder_path, video_name
+
+
+class PlaylistLoader:
+    """Load the labels and open the reader of a playlist video, usually ahead on a background thread.
+
+    The label files of the current and the next video are kept, so videos
+    sharing a concatenated CSV only filter their rows from it. A kept file is
+    read again once it or its store changes on disk.
+    """
+
+    def __init__(
+        self,
+        bbox_csv: str = None,
+        sequence_csv: str = None,
+        buffer_size: int = 32,
+        cache_mb: int = 512,
+        use_proxy: bool = True,
+        display_size: tuple = (1280, 720),
+        max_csvs: int = 4,
+    ):
+        self.bbox_csv = bbox_csv
+        self.sequence_csv = sequence_csv
+        self.buffer_size = buffer_size
+        self.cache_mb = cache_mb
+        self.use_proxy = use_proxy
+        self.display_size = display_size
+
+        self.max_csvs = max_csvs  # Bounding box and sequence files of two videos
+
+        self._csvs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def _read_csv(self, csv_path: str) -> pd.DataFrame:
+        """Read the CSV file, or reuse it if it is kept and unchanged on disk."""
+
+        # Modification time and size of the file the labels are read from
+        source_path = get_store_path(csv_path) if has_store(csv_path) else csv_path
+        stat = os.stat(source_path)
+        stamp = (source_path, stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._csvs.get(csv_path)
+            if cached is not None and cached[0] == stamp:
+                self._csvs.move_to_end(csv_path)
+                return cached[1]
+
+            # Drop the least recently used files, eg. of the videos already played
+            df = read_labels(csv_path)
+            self._csvs[csv_path] = (stamp, df)
+            self._csvs.move_to_end(csv_path)
+            while len(self._csvs) > self.max_csvs:
+                self._csvs.popitem(last=False)
+
+            return df
+
+    def _load_labels(self, csv_path: str, main_folder_path: str, video_name: str, csv_type: str):
+        """Get the labels of the video from the given CSV file, or from the labels folder of the dataset."""
+
+        # Outside the dataset layout, the given CSV file belongs to the video
+        if main_folder_path is None:
+            return self._read_csv(csv_path) if csv_path else None
+
+        if csv_path is None:
+
+            # Catalog the dataset once, instead of probing the labels folder for every video
+            if os.path.isdir(main_folder_path):
+                open_catalog(main_folder_path)
+            csv_path = look_for_csv_path(main_folder_path, video_name, csv_type)
+        if csv_path is None or not (os.path.exists(csv_path) or has_store(csv_path)):
+            return None
+
+        return filter_df(self._read_csv(csv_path), video_name)
+
+    def load(self, video_path: str) -> dict:
+        """Load the labels of the video and open its reader.
+
+        Returns:
+            dict: Video path, video name, bounding box and sequence DataFrames, and the reader.
+        """
+
+        main_folder_path, video_name = split_video_path(video_path)
+
+        return {
+            "video_path": video_path,
+            "video_name": video_name,
+            "df_bbox": self._load_labels(self.bbox_csv, main_folder_path, video_name, "bbox"),
+            "df_sequence": self._load_labels(
+                self.sequence_csv, main_folder_path, video_name, "sequence"
+            ),
+            "reader": open_reader(
+                video_path, self.buffer_size, self.cache_mb, self.use_proxy, self.display_size
+            ),
+        }
+
+
+def play_playlist(
+    video_paths: list,
+    bbox_csv: str = None,
+    sequence_csv: str = None,
+    cache_mb: int = 512,
+    use_proxy: bool = True,
+    show_timing: bool = False,
+    sequences_only: bool = False,
+) -> None:
+    """Play the videos one after another in the same viewer process.
+
+    While a video plays, the next one is loaded on a background thread: its
+    label rows are read and filtered, and its reader is opened and starts
+    decoding. Press 'n' or reach the end of a video to continue with the next.
+
+    Args:
+        video_paths (list): Paths to the video files, in the dataset layout to find their labels.
+        bbox_csv (str): Path to a bounding box CSV file shared by the videos. Defaults to the labels folder.
+        sequence_csv (str): Path to a sequence CSV file shared by the videos. Defaults to the labels folder.
+        cache_mb (int): Memory budget in MB for recently decoded frames of each video.
+        use_proxy (bool): Play the low-resolution proxies of the videos if built.
+        show_timing (bool): Show the decode, draw and display times and the dropped frames.
+        sequences_only (bool): Play only the frames inside the annotated sequences.
+    """
+
+    if len(video_paths) == 0:
+        raise FileNotFoundError("No video files to play.")
+
+    loader = PlaylistLoader(bbox_csv, sequence_csv, cache_mb=cache_mb, use_proxy=use_proxy)
+    preloader = ThreadPoolExecutor(max_workers=1)
+    pending = preloader.submit(loader.load, video_paths[0])
+
+    for i, video_path in enumerate(video_paths):
+
+        # Take the preloaded video and start loading the next one
+        try:
+            video = pending.result()
+        except (FileNotFoundError, ValueError, OSError) as e:
+            print(f"Warning: Skipping '{video_path}'. {e}")
+            video = None
+        if i + 1 < len(video_paths):
+            pending = preloader.submit(loader.load, video_paths[i + 1])
+        if video is None:
+            continue
+
+        print(f"Playing {i + 1}/{len(video_paths)}: {video['video_name']}")
+        visualize_video(
+            video["video_path"],
+            video["df_bbox"],
+            video["df_sequence"],
+            video["video_name"],
+            show_timing=show_timing,
+            sequences_only=sequences_only,
+            reader=video["reader"],
+        )
+
+    preloader.shutdown(wait=True)
@@ -0,0 +1,101 @@
+import sys
+import numpy as np
+
+sys.path.append(".")
+from src.sequence_index import SequenceIndex
+
+
+def merge_intervals(starts: np.ndarray, ends: np.ndarray) -> tuple:
+    """Merge overlapping and touching inclusive intervals.
+
+    Args:
+        starts (np.ndarray):    Start frames of the intervals.
+        ends (np.ndarray):      End frames of the intervals (inclusive).
+
+    Returns:
+        tuple: Sorted start and end frames of the merged intervals.
+    """
+
+    if len(starts) == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], ends[order]
+
+    # An interval opens a new group if it starts after every earlier interval ended
+    reach = np.maximum.accumulate(ends)
+    opens = np.append(True, starts[1:] > reach[:-1] + 1)
+    group = np.cumsum(opens) - 1
+
+    merged_ends = np.full(group[-1] + 1, np.iinfo(np.int64).min, dtype=np.int64)
+    np.maximum.at(merged_ends, group, ends)
+
+    return starts[opens], merged_ends
+
+
+class SegmentTimeline:
+    """Timeline playing only the frames inside the merged segments, back to back.
+
+    Maps between virtual indices, counting only the frames inside the segments,
+    and the real zero-based frame indices of the video.
+    """
+
+    def __init__(self, starts: np.ndarray, ends: np.ndarray):
+        """
+        Args:
+            starts (np.ndarray):    Start indices of the segments.
+            ends (np.ndarray):      End indices of the segments (inclusive).
+        """
+
+        self.starts, self.ends = merge_intervals(
+            np.asarray(starts, dtype=np.int64), np.asarray(ends, dtype=np.int64)
+        )
+
+        # Virtual index of the first frame of each segment
+        lengths = self.ends - self.starts + 1
+        self.offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+
+    @classmethod
+    def from_sequence_index(cls, sequence_index: SequenceIndex, total_frames: int = None):
+        """Build the timeline of the annotated sequences, converting frame IDs to zero-based indices."""
+
+        df = sequence_index.df_sequence
+        if df.empty:
+            return cls([], [])
+        df = df.dropna(subset=["start_frame", "end_frame"])
+        starts = df["start_frame"].to_numpy(dtype=np.int64) - 1
+        ends = df["end_frame"].to_numpy(dtype=np.int64) - 1
+
+        # Clip to the video
+        starts = np.maximum(starts, 0)
+        if total_frames is not None:
+            ends = np.minimum(ends, total_frames - 1)
+        valid = starts <= ends
+
+        return cls(starts[valid], ends[valid])
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def segment(self, index: int) -> int:
+        """Get the number of the segment containing or following the real index."""
+
+        return int(np.searchsorted(self.ends, index, side="left"))
+
+    def to_virtual(self, index: int) -> int:
+        """Get the virtual index of the real index, or of the next segment start if outside the segments."""
+
+        i = self.segment(index)
+        if i >= len(self.starts):
+            return len(self)
+
+        return int(self.offsets[i] + max(index - self.starts[i], 0))
+
+    def to_real(self, virtual: int) -> int:
+        """Get the real index of the virtual index, or None past the end of the timeline."""
+
+        if virtual < 0 or virtual >= len(self):
+            return None
+        i = np.searchsorted(self.offsets, virtual, side="right") - 1
+
+        return int(self.starts[i] + virtual - self.offsets[i])
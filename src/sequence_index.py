@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+from src.interval_join import encode_keys, build_segments, lookup_segments
+
+
+class SequenceIndex:
+    """Interval index of the sequences, keyed by pedestrian ID.
+
+    The sequences are split into sorted elementary segments per pedestrian, see
+    'build_segments', so the active sequence at a frame is found with one binary
+    search, independent of the number of annotated sequences. Overlapping
+    sequences resolve to the first row in the file, same as filtering the
+    DataFrame and taking the first match.
+    """
+
+    def __init__(self, df_sequence: pd.DataFrame = None):
+        self.codes = {}
+        self.segments = build_segments(np.zeros(0, dtype=np.int64), [], [])
+        self.rows = {}
+
+        # Empty index if no sequences are given
+        if df_sequence is None or df_sequence.empty:
+            self.df_sequence = pd.DataFrame()
+            return
+        self.df_sequence = df_sequence.reset_index(drop=True)
+
+        # Pedestrian IDs as key codes, rows without an ID or a complete interval are skipped
+        df = self.df_sequence
+        (codes,) = encode_keys([df], ["pedestrian_id"])
+        pedestrian_ids = df["pedestrian_id"].to_numpy(dtype=np.float64, na_value=np.nan)
+        self.codes = {
+            int(pedestrian_id): int(code)
+            for pedestrian_id, code in zip(pedestrian_ids[codes >= 0], codes[codes >= 0])
+        }
+
+        # Segments of all pedestrians on one axis
+        self.segments = build_segments(
+            codes,
+            df["start_frame"].to_numpy(dtype=np.float64, na_value=np.nan),
+            df["end_frame"].to_numpy(dtype=np.float64, na_value=np.nan),
+        )
+
+    def __len__(self) -> int:
+        return len(self.df_sequence)
+
+    def lookup(self, frame_id: int, pedestrian_id: int) -> int:
+        """Get the row position of the active sequence of a pedestrian, or -1 if none."""
+
+        code = self.codes.get(pedestrian_id)
+        if code is None:
+            return -1
+
+        return int(lookup_segments(self.segments, [code], [frame_id])[0])
+
+    def get(self, frame_id: int, pedestrian_id: int) -> pd.Series:
+        """Get the active sequence row of a pedestrian at a frame, or None if none."""
+
+        return self.row(self.lookup(frame_id, pedestrian_id))
+
+    def row(self, row: int) -> pd.Series:
+        """Get the sequence row at the position, or None if negative."""
+
+        if row < 0:
+            return None
+
+        # Reuse the row once it has been materialized
+        if row not in self.rows:
+            self.rows[row] = self.df_sequence.iloc[row]
+
+        return self.rows[row]
@@ -0,0 +1,138 @@
+import os
+import numpy as np
+import pandas as pd
+
+TRACK_KEYS = ["video_name", "camera", "pedestrian_id"]
+COORD_COLUMNS = ["x1", "y1", "x2", "y2"]
+
+
+def get_track_store_path(csv_path: str) -> str:
+    """Get the path of the track store next to a stretched CSV file, eg. 'stretched.csv' to 'stretched.tracks.npz'."""
+
+    return os.path.splitext(csv_path)[0] + ".tracks.npz"
+
+
+def build_tracks(df: pd.DataFrame) -> dict:
+    """Group stretched annotations into tracks, one per video, camera and pedestrian, sorted by frame.
+
+    Args:
+        df (pd.DataFrame): Stretched annotations, see 'scripts/stretch_sequence.py'.
+
+    Returns:
+        dict: Arrays of the tracks, the rows of each track contiguous:
+            'video_names', 'cameras', 'pedestrian_ids' (T,): Key of each track.
+            'lengths' (T,):     Rows of each track.
+            'frame_ids' (N,):   Frame of each row, int32.
+            'boxes' (N, 4):     Normalized 'x1', 'y1', 'x2', 'y2' of each row, float32.
+            'labels' (N,):      Gesture label of each row, int32, -1 if missing.
+    """
+
+    # Files without cameras form one track per pedestrian
+    keys = pd.DataFrame(
+        {
+            "video_name": df["video_name"].astype(str).to_numpy(),
+            "camera": (
+                df["camera"].astype(object).fillna("").astype(str).to_numpy()
+                if "camera" in df.columns
+                else np.full(len(df), "")
+            ),
+            "pedestrian_id": df["pedestrian_id"].to_numpy(dtype=np.int32),
+            "frame_id": df["frame_id"].to_numpy(dtype=np.int32),
+        }
+    )
+    order = keys.sort_values(TRACK_KEYS + ["frame_id"], kind="stable").index.to_numpy()
+    keys = keys.iloc[order]
+
+    # A new track starts wherever a key changes
+    changes = np.zeros(len(keys), dtype=bool)
+    if len(keys) > 0:
+        changes[0] = True
+        for column in TRACK_KEYS:
+            values = keys[column].to_numpy()
+            changes[1:] |= values[1:] != values[:-1]
+    starts = np.flatnonzero(changes)
+
+    return {
+        "video_names": keys["video_name"].to_numpy()[starts].astype(str),
+        "cameras": keys["camera"].to_numpy()[starts].astype(str),
+        "pedestrian_ids": keys["pedestrian_id"].to_numpy()[starts],
+        "lengths": np.diff(np.append(starts, len(keys))).astype(np.int64),
+        "frame_ids": keys["frame_id"].to_numpy(),
+        "boxes": df[COORD_COLUMNS].to_numpy(dtype=np.float32)[order],
+        "labels": df["gesture_label_id"].to_numpy(dtype=np.float64, na_value=-1).astype(np.int32)[order],
+    }
+
+
+def write_track_store(parts: list, store_path: str) -> None:
+    """Write the tracks to a NumPy store, with an offsets table into the contiguous row arrays.
+
+    Args:
+        parts (list):       Tracks of each partition from 'build_tracks', a track may not span partitions.
+        store_path (str):   Path to the '.npz' file.
+    """
+
+    arrays = {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+    arrays["offsets"] = np.append(0, np.cumsum(arrays.pop("lengths"))).astype(np.int64)
+
+    # Write to a temporary file, so readers never see a partial store
+    temp_path = store_path + ".part"
+    with open(temp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, store_path)
+
+
+class TrackStore:
+    """Tracks of a stretched annotation file, loaded once and sliced per track without parsing or grouping.
+
+    Example:
+        store = TrackStore("data/labels/actedgestures_stretched.tracks.npz")
+        frame_ids, boxes, labels = store[0]
+        frame_ids, boxes, labels = store.find("video_0", "front", 3)
+    """
+
+    def __init__(self, store_path: str):
+        if not os.path.exists(store_path):
+            raise FileNotFoundError(f"Track store {store_path} does not exist.")
+
+        with np.load(store_path, allow_pickle=False) as store:
+            self.offsets = store["offsets"]
+            self.video_names = store["video_names"]
+            self.cameras = store["cameras"]
+            self.pedestrian_ids = store["pedestrian_ids"]
+            self.frame_ids = store["frame_ids"]
+            self.boxes = store["boxes"]
+            self.labels = store["labels"]
+        self._positions = None
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, track: int) -> tuple:
+        """Get the frame ids (L,), boxes (L, 4) and labels (L,) of a track, as views into the store."""
+
+        if track < 0:
+            track += len(self)
+        if not 0 <= track < len(self):
+            raise IndexError(f"Track {track} out of range for {len(self)} tracks.")
+
+        start, end = self.offsets[track], self.offsets[track + 1]
+        return self.frame_ids[start:end], self.boxes[start:end], self.labels[start:end]
+
+    def key(self, track: int) -> tuple:
+        """Get the video name, camera and pedestrian ID of a track."""
+
+        return (
+            str(self.video_names[track]),
+            str(self.cameras[track]),
+            int(self.pedestrian_ids[track]),
+        )
+
+    def find(self, video_name: str, camera: str, pedestrian_id: int) -> tuple:
+        """Get a track by its key, see '__getitem__'. Returns None if not found."""
+
+        # Map the keys on first use
+        if self._positions is None:
+            self._positions = {self.key(track): track for track in range(len(self))}
+
+        track = self._positions.get((str(video_name), str(camera or ""), int(pedestrian_id)))
+        return None if track is None else self[track]
@@ -0,0 +1,204 @@
+import os
+import subprocess
+import cv2
+import numpy as np
+
+
+def get_index_path(video_path: str) -> str:
+    """Get the sidecar index path of a video, in a hidden '.index' folder next to it."""
+
+    video_dir, video_file = os.path.split(os.path.abspath(video_path))
+    return os.path.join(video_dir, ".index", os.path.splitext(video_file)[0] + ".npz")
+
+
+def scan_packets(video_path: str) -> tuple:
+    """Scan the video packets with ffprobe, without decoding.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        tuple: Presentation timestamps in seconds (N,) and keyframe indices, both in presentation order.
+    """
+
+    cmd = [
+        "ffprobe",
+        "-v",
+        "error",
+        "-select_streams",
+        "v:0",
+        "-show_entries",
+        "packet=pts_time,flags",
+        "-of",
+        "csv=p=0",
+        video_path,
+    ]
+    output = subprocess.check_output(cmd).decode("utf-8")
+
+    # Parse 'pts_time,flags' lines, skipping packets without a timestamp
+    pts, is_keyframe = [], []
+    for line in output.splitlines():
+        fields = line.strip().split(",")
+        if len(fields) < 2 or fields[0] in ("", "N/A"):
+            continue
+        pts.append(float(fields[0]))
+        is_keyframe.append("K" in fields[1])
+    if len(pts) == 0:
+        raise RuntimeError(f"Could not read packets from ffprobe output: {video_path}")
+
+    # Packets are in decode order, sort them into presentation order
+    pts = np.asarray(pts, dtype=np.float64)
+    order = np.argsort(pts, kind="stable")
+    keyframes = np.flatnonzero(np.asarray(is_keyframe)[order])
+
+    return pts[order], keyframes
+
+
+def scan_frames(video_path: str) -> tuple:
+    """Scan the video by grabbing every frame with OpenCV. Fallback without ffprobe, keyframes are unknown.
+
+    Args:
+        video_path (str): Path to the video file.
+
+    Returns:
+        tuple: Presentation timestamps in seconds (N,) and an empty keyframe array.
+    """
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video '{video_path}'.")
+
+    pts = []
+    while cap.grab():
+        pts.append(cap.get(cv2.CAP_PROP_POS_MSEC) / 1000)
+    cap.release()
+
+    return np.asarray(pts, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+
+class VideoIndex:
+    """Exact frame count, timestamps and keyframe positions of a video.
+
+    Built by a one-time scan and stored in a sidecar file next to the video, which
+    is reused until the video changes. Seeking jumps to the indexed timestamp of the
+    nearest keyframe, checks where the decoder landed and decodes forward to the
+    frame, instead of trusting 'CAP_PROP_POS_FRAMES' to land on the right frame.
+    """
+
+    def __init__(self, pts: np.ndarray, keyframes: np.ndarray):
+        self.pts = np.asarray(pts, dtype=np.float64)
+        self.keyframes = np.asarray(keyframes, dtype=np.int64)
+
+    @property
+    def frame_count(self) -> int:
+        return len(self.pts)
+
+    @classmethod
+    def load(cls, video_path: str, rebuild: bool = False) -> "VideoIndex":
+        """Load the sidecar index of a video, scanning the video if missing or outdated.
+
+        Args:
+            video_path (str):   Path to the video file.
+            rebuild (bool):     Scan the video even if the sidecar is up to date.
+
+        Returns:
+            VideoIndex: The index of the video.
+        """
+
+        if not os.path.isfile(video_path):
+            raise FileNotFoundError(f"Video file '{video_path}' not found.")
+
+        # Reuse the sidecar if newer than the video
+        index_path = get_index_path(video_path)
+        if (
+            not rebuild
+            and os.path.exists(index_path)
+            and os.path.getmtime(index_path) >= os.path.getmtime(video_path)
+        ):
+            with np.load(index_path) as data:
+                return cls(data["pts"], data["keyframes"])
+
+        # Scan the packets, or every frame if ffprobe is unavailable
+        try:
+            pts, keyframes = scan_packets(video_path)
+        except (OSError, subprocess.CalledProcessError, RuntimeError):
+            pts, keyframes = scan_frames(video_path)
+        video_index = cls(pts, keyframes)
+
+        # Write the sidecar, keep the index in memory on read-only storage
+        try:
+            os.makedirs(os.path.dirname(index_path), exist_ok=True)
+            np.savez(index_path, pts=video_index.pts, keyframes=video_index.keyframes)
+        except OSError as e:
+            print(f"Warning: Could not write video index '{index_path}': {e}")
+
+        return video_index
+
+    def nearest_keyframe(self, index: int) -> int:
+        """Get the last keyframe at or before the frame index, or the index itself if keyframes are unknown."""
+
+        i = np.searchsorted(self.keyframes, index, side="right") - 1
+        if i < 0:
+            return index
+
+        return int(self.keyframes[i])
+
+    def frame_time(self, index: int) -> float:
+        """Get the time in seconds of the frame index from the start of the video.
+
+        The index may equal the frame count, to get the end time of the last frame.
+        """
+
+        if index < self.frame_count:
+            return float(self.pts[index] - self.pts[0])
+
+        # Extrapolate past the last frame with the typical frame duration
+        duration = np.median(np.diff(self.pts)) if self.frame_count > 1 else 0.0
+        return float(self.pts[-1] - self.pts[0] + (index - self.frame_count + 1) * duration)
+
+    def locate(self, cap: cv2.VideoCapture) -> int:
+        """Get the frame index the next read of the capture returns, from the timestamp it reports.
+
+        Args:
+            cap (cv2.VideoCapture): Capture of the indexed video.
+
+        Returns:
+            int: Zero-based frame index.
+        """
+
+        # Nothing decoded yet, the next read is the first frame
+        if cap.get(cv2.CAP_PROP_POS_FRAMES) <= 0:
+            return 0
+
+        # The capture reports the timestamp of the last decoded frame, match it to the nearest indexed one
+        times = self.pts - self.pts[0]
+        time = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000
+        i = int(np.clip(np.searchsorted(times, time), 1, self.frame_count - 1)) if self.frame_count > 1 else 0
+        if i > 0 and time - times[i - 1] < times[i] - time:
+            i -= 1
+
+        return i + 1
+
+    def seek(self, cap: cv2.VideoCapture, index: int) -> None:
+        """Position the capture so the next read returns the frame index.
+
+        Args:
+            cap (cv2.VideoCapture): Capture of the indexed video.
+            index (int):            Zero-based frame index.
+        """
+
+        # Seek to the indexed timestamp of the nearest keyframe and check where the decoder landed
+        keyframe = self.nearest_keyframe(index)
+        position = index + 1
+        if keyframe > 0:
+            cap.set(cv2.CAP_PROP_POS_MSEC, self.frame_time(keyframe) * 1000)
+            position = self.locate(cap)
+
+        # Restart from the first frame if the seek overshot the target
+        if position > index:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            position = 0
+
+        # Decode forward to the target without retrieving
+        while position < index and cap.grab():
+            position += 1
@@ -0,0 +1,50 @@
+import os
+import sys
+
+sys.path.append(".")
+from src.video_index import VideoIndex
+
+
+def get_proxy_path(
+    video_path: str, videos_folder_name: str = "videos", proxies_folder_name: str = "proxies"
+) -> str:
+    """Get the proxy path of a video in the dataset layout, mirroring 'videos/' into 'proxies/'.
+
+    Args:
+        video_path (str):           Path to the video file, eg. 'project/videos/video_00/front.mp4'.
+        videos_folder_name (str):   Name of the videos folder.
+        proxies_folder_name (str):  Name of the proxies folder.
+
+    Returns:
+        str: Path to the proxy, eg. 'project/proxies/video_00/front.mp4'. None if the video is outside a videos folder.
+    """
+
+    parts = os.path.normpath(os.path.abspath(video_path)).split(os.sep)
+    if videos_folder_name not in parts[:-1]:
+        return None
+
+    # Replace the innermost videos folder
+    i = len(parts) - 2 - parts[-2::-1].index(videos_folder_name)
+    parts[i] = proxies_folder_name
+
+    # Proxies are always MP4
+    return os.path.splitext(os.sep.join(parts))[0] + ".mp4"
+
+
+def find_proxy(video_path: str) -> str:
+    """Get the proxy of a video if it is up to date and has the same frames, otherwise None."""
+
+    proxy_path = get_proxy_path(video_path)
+    if proxy_path is None or not os.path.isfile(proxy_path):
+        return None
+
+    # Outdated proxy
+    if os.path.getmtime(proxy_path) < os.path.getmtime(video_path):
+        return None
+
+    # Frame indices must map 1:1
+    if VideoIndex.load(proxy_path).frame_count != VideoIndex.load(video_path).frame_count:
+        print(f"Warning: Proxy '{proxy_path}' does not match the frame count of the video, skipping.")
+        return None
+
+    return proxy_path
@@ -0,0 +1,258 @@
+import os
+import sys
+import math
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+import cv2
+import numpy as np
+import pandas as pd
+
+sys.path.append(".")
+from src.bbox_index import BboxIndex
+from src.sequence_index import SequenceIndex
+from src.frame_cache import FrameCache
+from src.frame_reader import resize_to_display
+from src.video_index import VideoIndex
+from src.video_proxy import find_proxy
+from src.visualize_video_bbox import (
+    Controller,
+    draw_pedestrians,
+    draw_info,
+    filter_df,
+    GLYPHS,
+)
+
+
+def get_cluster_videos(cluster_dir: str) -> dict:
+    """Get the videos of a cluster, keyed by camera type.
+
+    Args:
+        cluster_dir (str): Folder with one video per camera, eg. 'front.mp4' or '2025-03-18_14-27-29-front.mp4'.
+
+    Returns:
+        dict: Camera type to video path, sorted by camera type.
+    """
+
+    if not os.path.exists(cluster_dir):
+        raise FileNotFoundError(f"Cluster folder '{cluster_dir}' not found.")
+    if not os.path.isdir(cluster_dir):
+        raise NotADirectoryError(f"'{cluster_dir}' is not a folder.")
+
+    # Same camera type naming as 'get_camera_types'
+    videos = {
+        video.split("-")[-1].split(".")[0]: os.path.join(cluster_dir, video)
+        for video in sorted(os.listdir(cluster_dir))
+        if video.endswith((".mp4", ".avi", ".mov", ".MP4"))
+    }
+    if len(videos) == 0:
+        raise FileNotFoundError(f"No video files found in '{cluster_dir}'.")
+
+    return dict(sorted(videos.items()))
+
+
+class StreamDecoder:
+    """Decoder of one camera stream, run on the shared thread pool.
+
+    Reading a frame shortly ahead grabs forward, so a stream that fell behind
+    catches up with the others, and counts the skipped frames as dropped while
+    playing. Frames further away are seeked through the video index. Decoded
+    frames are downsized to the tile size before caching and drawing.
+    """
+
+    def __init__(
+        self, video_path: str, cache_bytes: int, max_skip: int = 64, tile_size: tuple = None
+    ):
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"Could not open video '{video_path}'.")
+        self.video_index = VideoIndex.load(video_path)
+        self.total_frames = self.video_index.frame_count
+        self.cache = FrameCache(cache_bytes)
+        self.max_skip = max_skip
+        self.tile_size = tile_size
+
+        self.position = 0  # Index of the next frame the capture returns
+        self.dropped = 0
+        self._lock = threading.Lock()
+
+    def read(self, index: int, paced: bool = False) -> tuple:
+        """Read the frame at the index.
+
+        Args:
+            index (int):    Frame index.
+            paced (bool):   Whether the read is paced by playback, so frames skipped
+                            to catch up count as dropped, unlike a scrub while paused.
+
+        Returns:
+            tuple: The index and the decoded frame, or None past the end of the stream.
+        """
+
+        with self._lock:
+
+            # Serve redraws from the cache
+            frame = self.cache.get(index)
+            if frame is not None:
+                return index, frame
+            if index >= self.total_frames:
+                return index, None
+
+            # Catch up by grabbing forward, or seek if far away
+            if self.position <= index <= self.position + self.max_skip:
+                skipped = index - self.position
+                for _ in range(skipped):
+                    self.cap.grab()
+                if paced:
+                    self.dropped += skipped
+            else:
+                self.video_index.seek(self.cap, index)
+
+            ret, frame = self.cap.read()
+            self.position = index + 1
+            if not ret:
+                return index, None
+            if self.tile_size is not None:
+                frame = resize_to_display(frame, self.tile_size)
+            self.cache.put(index, frame)
+
+            return index, frame
+
+    def release(self):
+        with self._lock:
+            self.cap.release()
+
+
+def draw_grid(tiles: list, tile_size: tuple = (640, 360)) -> np.ndarray:
+    """Arrange the tiles in a grid with as many columns as rows, filling empty cells with black."""
+
+    columns = math.ceil(math.sqrt(len(tiles)))
+    rows = math.ceil(len(tiles) / columns)
+    width, height = tile_size
+
+    grid = np.zeros((rows * height, columns * width, 3), dtype=np.uint8)
+    for i, tile in enumerate(tiles):
+        if tile is None:
+            continue
+        row, column = divmod(i, columns)
+        if (tile.shape[1], tile.shape[0]) != tuple(tile_size):
+            tile = cv2.resize(tile, tile_size)
+        grid[row * height : (row + 1) * height, column * width : (column + 1) * width] = tile
+
+    return grid
+
+
+def visualize_cluster(
+    cluster_dir: str,
+    df_bbox: pd.DataFrame,
+    df_sequence: pd.DataFrame,
+    cache_mb: int = 512,
+    tile_size: tuple = (640, 360),
+    use_proxy: bool = True,
+) -> None:
+    """Visualize all cameras of a cluster in a grid, played in lockstep with their own bounding boxes and labels.
+
+    Every stream decodes on a shared thread pool. While playing, a stream that
+    misses the frame deadline keeps its last frame for that tick and catches up
+    on the next, counting the skipped frames as dropped.
+
+    Args:
+        cluster_dir (str): Folder with one video per camera.
+        df_bbox (pd.DataFrame): DataFrame containing bounding box information of the cluster.
+        df_sequence (pd.DataFrame): DataFrame containing sequence information of the cluster.
+        cache_mb (int): Memory budget in MB for recently decoded frames, shared by the streams.
+        tile_size (tuple): Width and height of each camera in the grid.
+        use_proxy (bool): Play the low-resolution proxies of the videos if built.
+    """
+
+    clip_name = os.path.basename(os.path.normpath(cluster_dir))
+    videos = get_cluster_videos(cluster_dir)
+
+    # Open the streams and index their own labels
+    streams, indexes = [], []
+    for camera, video_path in videos.items():
+        video_name = f"{clip_name}/{camera}"
+        if use_proxy:
+            video_path = find_proxy(video_path) or video_path
+        streams.append(
+            StreamDecoder(video_path, cache_mb * 1024**2 // len(videos), tile_size=tile_size)
+        )
+        df_video_sequence = filter_df(df_sequence, video_name)
+        indexes.append(
+            (
+                video_name,
+                BboxIndex(filter_df(df_bbox, video_name), df_video_sequence),
+                SequenceIndex(df_video_sequence),
+            )
+        )
+
+    # Initialize the controller on the longest stream
+    controller = Controller(max(stream.total_frames for stream in streams))
+    pool = ThreadPoolExecutor(max_workers=len(streams))
+    pending = [None] * len(streams)
+    shown = [(0, None)] * len(streams)  # Last index and frame of each stream
+
+    position = 0  # Index of the next frame to display
+    while True:
+
+        # Check if the video is playing or paused
+        if not controller.play:
+            position = max(int(controller.frame_id) - 1, 0)
+        if position >= controller.total_frames:
+            break
+
+        while True:
+
+            # Request the frame from every stream that is not showing it or still busy
+            for i, stream in enumerate(streams):
+                if pending[i] is None and (
+                    shown[i][0] != position or shown[i][1] is None
+                ):
+                    pending[i] = pool.submit(stream.read, position, controller.play)
+
+            # Wait for the streams, up to one frame interval while playing
+            timeout = controller.speed / 1000 if controller.play else None
+            wait([future for future in pending if future is not None], timeout=timeout)
+            for i, future in enumerate(pending):
+                if future is not None and future.done():
+                    shown[i] = future.result()
+                    pending[i] = None
+
+            # While paused, every stream shows the exact frame
+            if controller.play or all(index == position for index, _ in shown):
+                break
+
+        position += 1
+        controller.frame_id = position
+
+        # Draw each stream with its own labels in tile coordinates, on the frame it actually shows
+        tiles = []
+        for stream, (index, frame), (video_name, bbox_index, sequence_index) in zip(
+            streams, shown, indexes
+        ):
+            if frame is None:
+                tiles.append(None)
+                continue
+            frame = frame.copy()
+            if controller.show_hud:
+                frame = draw_pedestrians(frame, bbox_index, index + 1, sequence_index)
+                frame = draw_info(frame, video_name, index + 1, controller.speed)
+                GLYPHS.put_text(
+                    frame,
+                    f"Dropped: {stream.dropped}",
+                    (20, 200),
+                    1,
+                    (0, 0, 0),
+                    1,
+                    cv2.LINE_AA,
+                    cache=False,
+                )
+            tiles.append(frame)
+
+        # Display the grid
+        cv2.imshow("Processed Cluster", draw_grid(tiles, tile_size))
+        controller.control_video_playback()
+
+    # Release the streams
+    pool.shutdown(wait=True)
+    for stream in streams:
+        stream.release()
+    cv2.destroyAllWindows()
@@ -1,11 +1,33 @@
 # %%
 import cv2
+import numpy as np
 import pandas as pd
 import os
 import sys
+import time
 
 sys.path.append(".")
 from config.gesture_classes import Gesture
+from src.bbox_index import BboxIndex
+from src.sequence_index import SequenceIndex
+from src.frame_reader import FramePrefetcher
+from src.video_proxy import find_proxy
+from src.playback_clock import PlaybackClock
+from src.glyph_cache import GlyphCache
+from src.label_watcher import LabelWatcher
+from src.event_index import EventIndex
+from src.label_store import read_labels, has_store
+from src.label_schema import BBOX_SCHEMA, SEQUENCE_SCHEMA
+from src.csv_index import CsvRowIndex
+from src.catalog import path_exists
+from src.segments import SegmentTimeline
+
+# Gesture names and colors by label value, looked up per drawn label
+GESTURE_NAMES = {gesture.value: gesture.name for gesture in Gesture}
+GESTURE_COLORS = {gesture.value: gesture.color.value for gesture in Gesture}
+
+# Pre-rasterized label texts, shared by the drawing functions
+GLYPHS = GlyphCache()
 
 
 def split_clip_name(video_name: str) -> tuple:
@@ -99,7 +121,8 @@ def look_for_csv_path(
                 if p is not None
             ]
         )
-        if os.path.exists(csv_path):
+        # Labels may exist only as a columnar store
+        if path_exists(csv_path) or has_store(csv_path):
             return csv_path
 
     # Last resort: Look for concatenated CSV file
@@ -120,31 +143,66 @@ def look_for_concatenated_csv_path(
     csv_path = os.path.join(
         *[p for p in [main_folder_path, labels_folder_name, csv_file] if p is not None]
     )
-    if not os.path.exists(csv_path):
+    if not (path_exists(csv_path) or has_store(csv_path)):
         return None
 
     return csv_path
 
 
 def load_filter_df(
-    csv_path: str, video_name: list, csv_keys: list = ["video_name", "camera"]
+    csv_path: str,
+    video_name: list,
+    csv_keys: list = ["video_name", "camera"],
+    index_min_bytes: int = 16 * 1024**2,
 ) -> pd.DataFrame:
     """Filter the DataFrame for the given video name and camera name.
 
+    Large CSV files, like the concatenated one, get a sidecar row index on the
+    first load. Later loads read and parse only the rows of the video.
+
     Args:
         csv_path (str):     Path to the CSV file.
         video_name (str):   Name of the video.
         camera_name (str):  Name of the camera.
         csv_keys (list):    List of keys to filter by.
+        index_min_bytes (int): Size from which the CSV file is read through a row index.
 
     Returns:
         pd.DataFrame: Filtered DataFrame.
     """
 
-    if csv_path is None or not os.path.exists(csv_path):
+    if csv_path is None or not (os.path.exists(csv_path) or has_store(csv_path)):
         return None
 
-    df = pd.read_csv(csv_path, index_col=False)
+    # Read only the rows of the video from a large CSV file
+    if not has_store(csv_path) and os.path.getsize(csv_path) >= index_min_bytes:
+        row_index = CsvRowIndex.load(csv_path, csv_keys)
+        if row_index is not None:
+            df = row_index.read(csv_path, row_index.select(video_name, csv_keys))
+            return filter_df(df, video_name, csv_keys)
+
+    # Read the columnar store instead if converted
+    df = read_labels(csv_path)
+
+    return filter_df(df, video_name, csv_keys)
+
+
+def filter_df(
+    df: pd.DataFrame, video_name: str, csv_keys: list = ["video_name", "camera"]
+) -> pd.DataFrame:
+    """Filter the DataFrame for the given video name and camera name, by the most specific key available.
+
+    Args:
+        df (pd.DataFrame):  DataFrame to filter.
+        video_name (str):   Name of the video clip and camera name.
+        csv_keys (list):    List of keys to filter by.
+
+    Returns:
+        pd.DataFrame: Filtered DataFrame.
+    """
+
+    if df is None:
+        return None
 
     split_clip = video_name.split("/")
 
@@ -237,16 +295,19 @@ def get_df_pedestrian(
     return df_pedestrian
 
 
-def get_bbox_from_id(df_pedestrian: pd.DataFrame, frame: int) -> tuple:
-    """Get the bounding box coordinates for a given pedestrian ID from normalized coordinates to pixel values."""
+def get_bbox_from_id(df_pedestrian, frame: int) -> tuple:
+    """Get the bounding box coordinates for a given pedestrian ID from normalized coordinates to pixel values.
+
+    Accepts either the pedestrian DataFrame or a row of normalized coordinates from a `BboxIndex`.
+    """
 
     # Get the width and height of the frame
     width, height = frame.shape[1], frame.shape[0]
 
     # Get the bounding box coordinates
-    x1_norm, y1_norm, x2_norm, y2_norm = df_pedestrian.iloc[0][
-        ["x1", "y1", "x2", "y2"]
-    ].values
+    if isinstance(df_pedestrian, pd.DataFrame):
+        df_pedestrian = df_pedestrian.iloc[0][["x1", "y1", "x2", "y2"]].values
+    x1_norm, y1_norm, x2_norm, y2_norm = df_pedestrian
     x1, y1, x2, y2 = (
         x1_norm * width,
         y1_norm * height,
@@ -262,7 +323,6 @@ def draw_bbox(frame, x1, y1, x2, y2, pedestrian_id):
     """Draw the bounding box ID on the frame."""
 
     # Set the color and font for the bounding boxes
-    FONT = cv2.FONT_HERSHEY_DUPLEX
     SIZE = 0.5
     WIDTH = 1
     color = (0, 255, 0)  # Standard color
@@ -271,26 +331,21 @@ def draw_bbox(frame, x1, y1, x2, y2, pedestrian_id):
     cv2.rectangle(frame, (x1, y1), (x2, y2), color, WIDTH)
     string = f"ID: {str(pedestrian_id)}"
     location = (x1, y1 - 10)
-    cv2.putText(frame, string, location, FONT, SIZE, color, WIDTH)
+    GLYPHS.put_text(frame, string, location, SIZE, color, WIDTH)
 
     return frame
 
 
-def get_pedestrian_label_sequence(frame_sequence, pedestrian_id):
-    """Get the pedestrian label sequence from the DataFrame."""
-
-    # Filter the DataFrame for the current pedestrian ID
-    if frame_sequence is None or frame_sequence.empty:
-        return None
+def get_pedestrian_label_sequence(sequence_index: SequenceIndex, frame_id, pedestrian_id):
+    """Get the pedestrian label sequence active at the frame from the sequence index."""
 
-    # Filter for the current pedestrian and frame
-    frame_sequence = frame_sequence[frame_sequence["pedestrian_id"] == pedestrian_id]
-    if frame_sequence.empty:
+    # Check if there are any sequences
+    if sequence_index is None or len(sequence_index) == 0:
         return None
 
     # Get the first relevant label row
-    pedestrian_sequence = frame_sequence.iloc[0] if not frame_sequence.empty else None
-    
+    pedestrian_sequence = sequence_index.get(frame_id, pedestrian_id)
+
     return pedestrian_sequence
 
 
@@ -298,7 +353,6 @@ def draw_gesture_labels(frame, x1, y1, pedestrian_sequence):
     """Draw gesture labels on the frame from the DataFrame."""
 
     # Set the color and font for the labels
-    FONT = cv2.FONT_HERSHEY_DUPLEX
     SIZE = 0.5
     WIDTH = 1
 
@@ -328,16 +382,16 @@ def draw_gesture_labels(frame, x1, y1, pedestrian_sequence):
 
         # Specific label handling
         if label_name == "Gesture":
-            label_text += f" ({Gesture(label_value).name})"
+            label_text += f" ({GESTURE_NAMES[label_value]})"
             color = (
-                Gesture(label_values["Gesture"]).color.value
+                GESTURE_COLORS[label_values["Gesture"]]
                 if "Gesture" in label_values
                 else (0, 0, 255)
             )
 
         # Set the position for the label text
         label_position = (x1, y1 - 10 - (idx + 1) * 25)
-        cv2.putText(frame, label_text, label_position, FONT, SIZE, color, WIDTH)
+        GLYPHS.put_text(frame, label_text, label_position, SIZE, color, WIDTH)
 
     return frame
 
@@ -349,7 +403,7 @@ def draw_bbox_duplicate_alert(frame, pedestrian_ids):
     RED_COLOR = (0, 0, 255)
 
     # Check for duplicate pedestrian IDs
-    if not pedestrian_ids.duplicated().any():
+    if len(np.unique(pedestrian_ids)) == len(pedestrian_ids):
         return frame
 
     # Locate center of the frame for alert text
@@ -367,106 +421,131 @@ def draw_bbox_duplicate_alert(frame, pedestrian_ids):
     )
 
 
-def draw_pedestrians(frame, df_bbox, frame_id, df_sequence):
+def draw_pedestrians(frame, bbox_index: BboxIndex, frame_id, sequence_index: SequenceIndex):
     """Draw pedestrians and their bounding boxes on the frame."""
 
-    # Get the current frame
-    current_frame = df_bbox[df_bbox["frame_id"] == frame_id]
-    if current_frame.empty:
-        return frame
-    
-    # Get the pedestrian IDs
-    pedestrian_ids = current_frame["pedestrian_id"]
-    if pedestrian_ids.empty:
+    # Get the pedestrians of the current frame
+    pedestrian_ids, coords = bbox_index.lookup(frame_id)
+    if len(pedestrian_ids) == 0:
         return frame
-    
-    frame_sequence = (
-        df_sequence[
-            (df_sequence["start_frame"] <= frame_id)
-            & (df_sequence["end_frame"] >= frame_id)
-        ]
-        if df_sequence is not None and not df_sequence.empty
-        else pd.DataFrame()
-    )
 
-    for i, pedestrian_id in enumerate(pedestrian_ids):
+    # Draw alert for duplicate IDs
+    draw_bbox_duplicate_alert(frame, pedestrian_ids)
 
-        # Get the pedestrian DataFrame for the current ID
-        pedestrian = get_df_pedestrian(df_bbox, frame_id, pedestrian_id)
-        if pedestrian is None:
-            continue
+    # Sequence rows joined up front by the index, eg. when exporting
+    sequence_rows = bbox_index.lookup_sequence_rows(frame_id)
 
-        # Draw alert for duplicate IDs
-        draw_bbox_duplicate_alert(frame, pedestrian_ids)
+    for i, (pedestrian_id, coord) in enumerate(zip(pedestrian_ids, coords)):
 
         # Get the bounding box coordinates
-        x1, y1, x2, y2 = get_bbox_from_id(pedestrian, frame)
+        x1, y1, x2, y2 = get_bbox_from_id(coord, frame)
         draw_bbox(frame, x1, y1, x2, y2, pedestrian_id)
 
         # Get and draw gesture labels
-        pedestrian_sequence = get_pedestrian_label_sequence(
-            frame_sequence, pedestrian_id
-        )
+        if sequence_rows is not None and sequence_index is not None:
+            pedestrian_sequence = sequence_index.row(sequence_rows[i])
+        else:
+            pedestrian_sequence = get_pedestrian_label_sequence(
+                sequence_index, frame_id, pedestrian_id
+            )
         draw_gesture_labels(frame, x1, y1, pedestrian_sequence)
 
     return frame
 
 
-def draw_info(frame, video_name, frame_id, interval):
-    """Draw the video name, frame number, and interval on the frame."""
+def draw_timing(frame, clock: PlaybackClock):
+    """Draw the decode, draw and display times and the dropped frames at the bottom of the frame."""
+
+    timings = " | ".join(
+        f"{stage.capitalize()}: {ms:.1f} ms" for stage, ms in clock.timings.items()
+    )
+    text = f"{timings} | Dropped: {clock.dropped} | Target: {clock.fps * clock.rate:.1f} fps"
+    GLYPHS.put_text(
+        frame,
+        text,
+        (20, frame.shape[0] - 20),
+        0.6,
+        (0, 0, 0),
+        1,
+        cv2.LINE_AA,
+        cache=False,  # Changes every frame
+    )
+
+    return frame
+
+
+def draw_info(frame, video_name, frame_id, interval=None):
+    """Draw the video name, frame number, and interval on the frame. Skips the speed without an interval."""
 
+    # Texts and whether to cache them, the frame number changes every frame
     info = [
-        f"Video: {video_name}",
-        f"Frame: {frame_id}",
-        f"Speed: {int(64/interval)}",
+        (f"Video: {video_name}", True),
+        (f"Frame: {frame_id}", False),
     ]
-    for i, text in enumerate(info):
-        cv2.putText(
+    if interval is not None:
+        info.append((f"Speed: {int(64/interval)}", True))
+    for i, (text, cache) in enumerate(info):
+        GLYPHS.put_text(
             frame,
             text,
             (20, 50 + i * 50),
-            cv2.FONT_HERSHEY_DUPLEX,
             1,
             (0, 0, 0),
             1,
             cv2.LINE_AA,
+            cache=cache,
         )
 
     return frame
 
 
 class Controller:
-    def __init__(self, total_frames):
+    def __init__(self, total_frames, show_timing=False):
         # Set default values for the controller
         self.play = False
         self.frame_id = 0
         self.speed = 8
+        self.base_speed = self.speed  # Speed of real-time playback
         self.max_speed = 64
         self.show_hud = True
+        self.show_timing = show_timing
+        self.idle_delay = 0  # Wait in ms while paused, 0 waits for a key
+        self.events = None  # Event index for the jump keys
+        self.next_video = False  # Skip to the next video of a playlist
 
         # Set the total number of frames
         self.total_frames = total_frames
 
-    def control_video_playback(self):
-        """Control video playback with keyboard input."""
+    @property
+    def rate(self) -> float:
+        """Playback speed factor relative to real time."""
+        return self.base_speed / self.speed
+
+    def control_video_playback(self, delay=None):
+        """Control video playback with keyboard input. Waits the delay in ms while playing, defaults to the speed."""
 
         # Get key press
-        key = cv2.waitKeyEx(self.speed if self.play else 0)
+        key = cv2.waitKeyEx((delay or self.speed) if self.play else self.idle_delay)
         # print(f"Key pressed: {key}")
 
         # Control HUD visibility
         self.show_hud = (
             not self.show_hud if key == 104 else self.show_hud
         )  # 'h' to toggle HUD
+        self.show_timing = (
+            not self.show_timing if key == 116 else self.show_timing
+        )  # 't' to toggle timing HUD
 
         # Control playback state
         self.play = (
             not self.play if key == 32 else self.play
         )  # Space to toggle play/pause
         exit() if key == 113 else None  # 'q' to exit
+        self.next_video = self.next_video or key == 110  # 'n' for the next video
 
         self._interval_control(key)
         self._update_frame_id(key)
+        self._jump_to_event(key)
 
     def _interval_control(self, key):
         """Control the interval for frame navigation."""
@@ -493,52 +572,228 @@ class Controller:
 
         return
 
+    # Keys jumping to the previous and next event of each type
+    EVENT_KEYS = {
+        ord("["): ("sequence", -1),
+        ord("]"): ("sequence", 1),
+        ord(","): ("track", -1),
+        ord("."): ("track", 1),
+        ord("-"): ("duplicate", -1),
+        ord("="): ("duplicate", 1),
+    }
+
+    def _jump_to_event(self, key):
+        """Jump to the previous or next event and pause there."""
+
+        if self.events is None or key not in self.EVENT_KEYS:
+            return
+
+        # Search from the frame on screen, the play mode already stepped ahead
+        event, direction = self.EVENT_KEYS[key]
+        frame_id = int(self.frame_id) - (1 if self.play else 0)
+        if direction > 0:
+            target = self.events.next(event, frame_id)
+        else:
+            target = self.events.previous(event, frame_id)
+        if target is None or not 1 <= target <= self.total_frames:
+            return
+
+        self.frame_id = target
+        self.play = False
+
+
+def open_reader(
+    video_path: str,
+    buffer_size: int = 32,
+    cache_mb: int = 512,
+    use_proxy: bool = True,
+    display_size: tuple = (1280, 720),
+) -> FramePrefetcher:
+    """Open the video for the viewer, playing the proxy instead if one is built."""
+
+    # Frames of the proxy map 1:1 and the boxes are normalized
+    if use_proxy:
+        video_path = find_proxy(video_path) or video_path
+
+    return FramePrefetcher(
+        video_path,
+        buffer_size=buffer_size,
+        cache_bytes=cache_mb * 1024**2,
+        display_size=display_size,
+    )
+
 
 def visualize_video(
     video_path: str,
     df_bbox: pd.DataFrame,
     df_sequence: pd.DataFrame,
     video_name: str = None,
+    buffer_size: int = 32,
+    cache_mb: int = 512,
+    use_proxy: bool = True,
+    show_timing: bool = False,
+    display_size: tuple = (1280, 720),
+    bbox_csv: str = None,
+    sequence_csv: str = None,
+    watch_interval: float = 0.5,
+    sequences_only: bool = False,
+    reader: FramePrefetcher = None,
+    filter_labels: bool = False,
 ) -> None:
     """Visualize the video with bounding boxes and labels.
 
+    Playback is paced at the source fps times the speed factor, skipping frames
+    when decoding and drawing fall behind. Frames are downsized to the display
+    size right after decoding, and the boxes and labels are drawn in display
+    coordinates on top, so the text stays crisp at any source resolution.
+
+    In sequences-only mode, the overlapping sequence intervals are merged and
+    only their frames are played, back to back. Nearing the end of a segment,
+    the start of the next one is decoded into the cache in the background, so
+    playback continues there without waiting for the seek.
+
     Args:
         video_path (str): Path to the video file.
         df_bbox (pd.DataFrame): DataFrame containing bounding box information.
         df_sequence (pd.DataFrame): DataFrame containing sequence information.
+        video_name (str): Name of the video shown in the HUD.
+        buffer_size (int): Number of frames decoded ahead on the background thread.
+        cache_mb (int): Memory budget in MB for recently decoded frames.
+        use_proxy (bool): Play the low-resolution proxy of the video if one is built, for fast seeking.
+        show_timing (bool): Show the decode, draw and display times and the dropped frames. Toggle with 't'.
+        display_size (tuple): Width and height of the displayed frames.
+        bbox_csv (str): Path to the bounding box CSV file to load and watch instead of 'df_bbox'.
+        sequence_csv (str): Path to the sequence CSV file to load and watch instead of 'df_sequence'.
+        watch_interval (float): Seconds between checks of the watched CSV files.
+        sequences_only (bool): Play only the frames inside the annotated sequences.
+        reader (FramePrefetcher): Already opened reader of the video, eg. preloaded by a playlist.
+        filter_labels (bool): Index only the rows of 'video_name' from the watched CSV files, eg. of a concatenated CSV.
     """
 
-    # Load the video
-    cap = cv2.VideoCapture(video_path)
+    # Watch the CSV files, their indexes are rebuilt from the video's rows when the labels are edited
+    row_filter = (lambda df: filter_df(df, video_name)) if filter_labels else None
+    bbox_watcher = (
+        LabelWatcher(bbox_csv, BboxIndex, row_filter, interval=watch_interval, schema=BBOX_SCHEMA)
+        if bbox_csv
+        else None
+    )
+    sequence_watcher = (
+        LabelWatcher(
+            sequence_csv, SequenceIndex, row_filter, interval=watch_interval, schema=SEQUENCE_SCHEMA
+        )
+        if sequence_csv
+        else None
+    )
+
+    # Index the bounding boxes by frame and the sequences by interval once
+    bbox_index = bbox_watcher.index if bbox_watcher else BboxIndex(df_bbox)
+    sequence_index = sequence_watcher.index if sequence_watcher else SequenceIndex(df_sequence)
+
+    # Load the video and decode ahead on a background thread
+    if reader is None:
+        reader = open_reader(video_path, buffer_size, cache_mb, use_proxy, display_size)
     # Get variables from the video
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    # Initialize the controller
-    controller = Controller(total_frames)
+    total_frames = reader.total_frames
+    # Initialize the controller and the playback clock
+    controller = Controller(total_frames, show_timing)
+    clock = PlaybackClock(reader.fps)
+
+    controller.events = EventIndex(bbox_index, sequence_index)
+
+    # Redraw the paused frame when the labels are edited
+    if bbox_watcher or sequence_watcher:
+        controller.idle_delay = max(1, int(watch_interval * 1000))
+
+    # Play only the sequences, the clock counts the frames inside them
+    timeline = None
+    if sequences_only:
+        timeline = SegmentTimeline.from_sequence_index(sequence_index, total_frames)
+        if len(timeline) == 0:
+            print("Warning: No sequences to play, playing the whole video.")
+            timeline = None
+        else:
+            controller.frame_id = int(timeline.starts[0]) + 1
+    warmed = set()  # Segments whose successor has been warmed
+    warm_frames = 2 * buffer_size
+
+    def clock_index(index):
+        return timeline.to_virtual(index) if timeline else index
 
     # Create a window to display the video
-    while cap.isOpened():
+    position = 0  # Index of the next frame to display
+    while True:
 
-        # Check if the video is playing or paused and read the frame
+        # Check if the video is playing or paused, skip frames when behind
         if not controller.play:
-            cap.set(cv2.CAP_PROP_POS_FRAMES, controller.frame_id - 1)
-
-        ret, frame = cap.read()
-        if not ret:
+            position = max(int(controller.frame_id) - 1, 0)
+        elif timeline:
+            position = timeline.to_real(clock.skip_to_due(clock_index(position)))
+            if position is None:
+                break
+        else:
+            position = clock.skip_to_due(position)
+
+        start_time = time.perf_counter()
+        frame = reader.read(position)
+        if frame is None:
             break
-        controller.frame_id = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
-
-        # Draw bounding boxes on the frame
+        position += 1
+        controller.frame_id = position
+        clock.record("decode", time.perf_counter() - start_time)
+
+        # Warm the start of the next segment before reaching the end of this one
+        if timeline:
+            segment = timeline.segment(position - 1)
+            if (
+                segment + 1 < len(timeline.starts)
+                and segment not in warmed
+                and timeline.ends[segment] - (position - 1) <= warm_frames
+            ):
+                reader.warm(int(timeline.starts[segment + 1]), warm_frames)
+                warmed.add(segment)
+
+        # Swap in the indexes of edited label files
+        reloaded = False
+        if bbox_watcher and bbox_watcher.poll():
+            bbox_index, reloaded = bbox_watcher.index, True
+        if sequence_watcher and sequence_watcher.poll():
+            sequence_index, reloaded = sequence_watcher.index, True
+            if timeline:
+                reloaded_timeline = SegmentTimeline.from_sequence_index(sequence_index, total_frames)
+                if len(reloaded_timeline) > 0:
+                    timeline = reloaded_timeline
+                    warmed.clear()
+        if reloaded:
+            controller.events = EventIndex(bbox_index, sequence_index)
+
+        # Draw bounding boxes on the display frame, the normalized boxes scale to it
+        start_time = time.perf_counter()
         if controller.show_hud:
-            frame = draw_pedestrians(frame, df_bbox, controller.frame_id, df_sequence)
+            frame = draw_pedestrians(
+                frame, bbox_index, controller.frame_id, sequence_index
+            )
             frame = draw_info(frame, video_name, controller.frame_id, controller.speed)
+        clock.record("draw", time.perf_counter() - start_time)
 
         # Display the frame
-        frame = cv2.resize(frame, (1280, 720))
+        start_time = time.perf_counter()
+        if controller.show_timing:
+            frame = draw_timing(frame, clock)
         cv2.imshow("Processed Video", frame)
-        controller.control_video_playback()
+        clock.record("display", time.perf_counter() - start_time)
+
+        # Wait until the next frame is due
+        was_playing, speed = controller.play, controller.speed
+        controller.control_video_playback(clock.delay_ms(clock_index(position)))
+        if controller.next_video:
+            break
+
+        # Restart the clock when playback starts or changes speed
+        if controller.play and (not was_playing or controller.speed != speed):
+            clock.reset(clock_index(position), controller.rate)
 
-    # Release the VideoCapture and VideoWriter objects
-    cap.release()
+    # Release the video reader
+    reader.release()
     cv2.destroyAllWindows()
 
 
@@ -0,0 +1,41 @@
+import sys
+import os
+import pandas as pd
+
+sys.path.append(".")
+from src.label_store import get_store_path, write_store, read_labels
+from src.label_schema import BBOX_SCHEMA
+from src.visualize_video_bbox import look_for_csv_path, load_filter_df
+
+
+def test_store_only_labels(tmp_path):
+    """Labels written only as a columnar store are found and loaded like a CSV file."""
+
+    # Write the bbox labels of one video as a store, without the CSV file
+    csv_path = os.path.join(tmp_path, "labels", "bbox", "video_0_front.csv")
+    os.makedirs(os.path.dirname(csv_path))
+    df = pd.DataFrame(
+        {
+            "video_name": ["video_0", "video_0", "video_1"],
+            "camera": ["front", "front", "front"],
+            "frame_id": [0, 1, 0],
+            "pedestrian_id": [3, 3, 4],
+            "x1": [0.1, 0.2, 0.3],
+            "y1": [0.1, 0.2, 0.3],
+            "x2": [0.5, 0.6, 0.7],
+            "y2": [0.5, 0.6, 0.7],
+        }
+    )
+    write_store(df, get_store_path(csv_path))
+    assert not os.path.exists(csv_path)
+
+    # The lookup returns the CSV path the store belongs to
+    found = look_for_csv_path(str(tmp_path), "video_0/front", "bbox")
+    assert found == csv_path
+
+    labels = read_labels(found, BBOX_SCHEMA)
+    assert len(labels) == 3
+    assert labels["frame_id"].tolist() == [0, 1, 0]
+
+    filtered = load_filter_df(found, "video_1")
+    assert filtered["pedestrian_id"].tolist() == [4]